@@ -0,0 +1,62 @@
+import csv
+import io
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .services import FIRST_IMAGE
+
+EXPORT_FORMATS = {
+    "csv":    "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_FIELDS = [
+    "detail_id", "isbn", "name", "price", "condition", "seller", "url", "date_scraped", "first_seen",
+    "availability", "interest", "contact",
+]
+CHUNK_SIZE = 2000  # rows per server-side cursor fetch and per yielded block
+
+
+def export_rows(detail):
+    """
+    (EXPORT_FIELDS values..., first image) tuples in detail_id order, read in
+    CHUNK_SIZE batches through a server-side cursor so memory stays flat. The
+    first image is extracted in SQL, as in services.detail_values().
+    """
+    rows = detail.order_by("detail_id").values_list(*EXPORT_FIELDS, FIRST_IMAGE)
+    return rows.iterator(chunk_size=CHUNK_SIZE)
+
+
+def chunked(lines, size: int = CHUNK_SIZE):
+    """Join `size` lines per yield; one WSGI write per row is far slower than the query."""
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) == size:
+            yield "".join(block)
+            block.clear()
+    if block:
+        yield "".join(block)
+
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values) -> str:
+        writer.writerow(values)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    yield line([*EXPORT_FIELDS, "image"])
+    yield from chunked(line(values) for values in rows)
+
+
+def iter_ndjson(rows):
+    fields = [*EXPORT_FIELDS, "image"]
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    yield from chunked(encoder.encode(dict(zip(fields, values))) + "\n" for values in rows)
+
+
+EXPORT_WRITERS = {"csv": iter_csv, "ndjson": iter_ndjson}
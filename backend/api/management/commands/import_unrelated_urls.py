@@ -0,0 +1,44 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Source, UnrelatedUrl
+
+
+class Command(BaseCommand):
+    help = (
+        "One-off import of a legacy '<spider>_unrelated_urls.csv' blocklist (Search Term,Url) into "
+        "unrelated_urls_table. Rows are stored under the domain's first list; the scraper looks them "
+        "up (and expires them) per domain. Re-running skips rows already stored."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--domain", default="www.vinted.es", help="spider_domain the urls belong to")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, csv_path, domain, batch_size, **options):
+        source = Source.objects.filter(spider_domain=domain).order_by("spider_id").first()
+        if source is None:
+            raise CommandError(f"No source_table row for {domain}; run one of its spiders first.")
+
+        unrelated = UnrelatedUrl.objects.filter(site_id=source.spider_id)
+        before = unrelated.count()
+        try:
+            with open(csv_path, newline="", encoding="utf-8") as csv_file:
+                batch = []
+                for row in csv.DictReader(csv_file):
+                    if row.get("Search Term") and row.get("Url"):
+                        batch.append(
+                            UnrelatedUrl(site_id=source.spider_id, search_term=row["Search Term"], url=row["Url"])
+                        )
+                    if len(batch) >= batch_size:
+                        UnrelatedUrl.objects.bulk_create(batch, ignore_conflicts=True)
+                        batch = []
+                UnrelatedUrl.objects.bulk_create(batch, ignore_conflicts=True)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {unrelated.count() - before} unrelated urls for {source.spider_name} ({domain})"
+        ))
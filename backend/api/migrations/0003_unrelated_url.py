@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-17 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_detail_contact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnrelatedUrl',
+            fields=[
+                ('unrelated_id', models.AutoField(primary_key=True, serialize=False)),
+                ('site_id', models.IntegerField()),
+                ('search_term', models.CharField(max_length=255)),
+                ('url', models.TextField()),
+                ('date_added', models.DateField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'unrelated_urls_table',
+                'indexes': [models.Index(fields=['date_added'], name='ix_unrelated_date_added')],
+                'constraints': [models.UniqueConstraint(fields=('site_id', 'search_term', 'url'), name='uq_unrelated_site_term_url')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-17 13:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_unrelated_url'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['site_id', 'isbn', 'availability'], name='ix_details_site_isbn_avail'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['history', 'availability'], name='ix_details_hist_avail'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['first_seen', 'detail_id'], name='ix_details_first_seen'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['price', 'detail_id'], name='ix_details_price'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(condition=models.Q(('availability', True)), fields=['isbn', 'detail_id'], name='ix_details_avail_isbn'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(condition=models.Q(('availability', False)), fields=['date_scraped'], name='ix_details_sold_scraped'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.4 on 2026-10-17 14:04
+
+from datetime import date
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+
+
+def build_summaries(apps, schema_editor):
+    """Initial fill; afterwards the scraper refreshes each site when its spider closes."""
+    Detail = apps.get_model("api", "Detail")
+    Summary = apps.get_model("api", "Summary")
+
+    available = Q(availability=True)
+    for group_by in ("isbn", "seller"):
+        rows = (
+            Detail.objects.values("site_id", group_by)
+            .annotate(
+                available_books=Count("detail_id", filter=available),
+                sold_books=Count("detail_id", filter=Q(availability=False)),
+                price_sum=Sum("price", filter=available),
+                avg_price=Avg("price", filter=available),
+                min_price=Min("price", filter=available),
+                max_price=Max("price", filter=available),
+            )
+            .order_by()
+        )
+        Summary.objects.bulk_create(
+            (
+                Summary(
+                    site_id=row["site_id"], group_by=group_by, group_key=row[group_by] or "",
+                    available_books=row["available_books"], sold_books=row["sold_books"],
+                    price_sum=row["price_sum"] or 0, avg_price=row["avg_price"],
+                    min_price=row["min_price"], max_price=row["max_price"],
+                    rotation_rate=row["sold_books"] * 100 / (row["available_books"] or 1),
+                    updated_on=date.today(),
+                )
+                for row in rows.iterator()
+                if row["site_id"] is not None
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_detail_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Summary',
+            fields=[
+                ('summary_id', models.AutoField(primary_key=True, serialize=False)),
+                ('site_id', models.IntegerField()),
+                ('group_by', models.CharField(max_length=10)),
+                ('group_key', models.TextField()),
+                ('available_books', models.IntegerField(default=0)),
+                ('sold_books', models.IntegerField(default=0)),
+                ('price_sum', models.FloatField(default=0)),
+                ('avg_price', models.FloatField(null=True)),
+                ('min_price', models.FloatField(null=True)),
+                ('max_price', models.FloatField(null=True)),
+                ('rotation_rate', models.FloatField(default=0)),
+                ('updated_on', models.DateField()),
+            ],
+            options={
+                'db_table': 'summary_table',
+                'indexes': [models.Index(fields=['group_by', 'group_key'], name='ix_summary_group_key')],
+                'constraints': [models.UniqueConstraint(fields=('site_id', 'group_by', 'group_key'), name='uq_summary_site_group_key')],
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-17 14:06
+
+from django.db import migrations, models
+
+
+def create_response_version(apps, schema_editor):
+    apps.get_model("api", "CacheVersion").objects.get_or_create(name="responses")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.IntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'cache_version_table',
+            },
+        ),
+        migrations.RunPython(create_response_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-17 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_cache_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceObservation',
+            fields=[
+                ('observation_id', models.AutoField(primary_key=True, serialize=False)),
+                ('detail_id', models.IntegerField()),
+                ('isbn', models.CharField(max_length=255)),
+                ('observed_on', models.DateField()),
+                ('price', models.FloatField()),
+            ],
+            options={
+                'db_table': 'price_history_table',
+                'indexes': [models.Index(fields=['isbn', 'observed_on', 'price'], name='ix_price_isbn_date')],
+                'constraints': [models.UniqueConstraint(fields=('detail_id', 'observed_on'), name='uq_price_detail_date')],
+            },
+        ),
+        # Seed each existing listing with its current price as of its last scrape
+        migrations.RunSQL(
+            "INSERT INTO price_history_table (detail_id, isbn, observed_on, price) "
+            "SELECT detail_id, isbn, date_scraped, price FROM details_table",
+            migrations.RunSQL.noop,
+        ),
+    ]
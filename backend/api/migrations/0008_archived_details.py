@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-17 14:21
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_price_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedDetail',
+            fields=[
+                ('detail_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('history_id', models.IntegerField()),
+                ('isbn', models.CharField(max_length=255)),
+                ('date_scraped', models.DateField()),
+                ('first_seen', models.DateField()),
+                ('site_id', models.IntegerField(blank=True, null=True)),
+                ('name', models.TextField()),
+                ('price', models.FloatField()),
+                ('seller', models.TextField()),
+                ('condition', models.TextField()),
+                ('editorial', models.TextField()),
+                ('images', api.models.SafeJSONField()),
+                ('url', models.TextField()),
+                ('interest', models.CharField(choices=[('pending', 'Pending'), ('interested', 'Interested'), ('not_interested', 'Not Interested')], default='pending', max_length=20)),
+                ('contact', models.BooleanField(default=False)),
+                ('archived_on', models.DateField()),
+            ],
+            options={
+                'db_table': 'archived_details_table',
+                'indexes': [models.Index(fields=['history_id'], name='ix_archived_history'), models.Index(fields=['site_id', 'isbn'], name='ix_archived_site_isbn'), models.Index(fields=['date_scraped'], name='ix_archived_date_scraped')],
+            },
+        ),
+    ]
@@ -89,6 +89,144 @@ class Detail(models.Model):
 
     class Meta:
         db_table = "details_table"
+        # Access paths of get_details() and the scraper; mirrored in books_scraper/spiders/models.py
+        indexes = [
+            models.Index(fields=["site_id", "isbn", "availability"], name="ix_details_site_isbn_avail"),
+            models.Index(fields=["history", "availability"], name="ix_details_hist_avail"),
+            models.Index(fields=["first_seen", "detail_id"], name="ix_details_first_seen"),
+            models.Index(fields=["price", "detail_id"], name="ix_details_price"),
+            models.Index(fields=["isbn", "detail_id"], name="ix_details_avail_isbn",
+                         condition=models.Q(availability=True)),
+            models.Index(fields=["date_scraped"], name="ix_details_sold_scraped",
+                         condition=models.Q(availability=False)),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ArchivedDetail(models.Model):
+    """
+    Sold listings moved out of details_table by the scraper once they are
+    older than SOLD_ARCHIVE_AFTER_DAYS; detail_id keeps its original value.
+    Still counted in history_table.sold_books and summary_table.
+    """
+    detail_id    = models.IntegerField(primary_key=True)
+    history_id   = models.IntegerField()
+    isbn         = models.CharField(max_length=255)
+    date_scraped = models.DateField()
+    first_seen   = models.DateField()
+    site_id      = models.IntegerField(null=True, blank=True)
+    name         = models.TextField()
+    price        = models.FloatField()
+    seller       = models.TextField()
+    condition    = models.TextField()
+    editorial    = models.TextField()
+    images       = SafeJSONField()
+    url          = models.TextField()
+    interest     = models.CharField(max_length=20, choices=Detail.INTEREST_CHOICES, default=Detail.PENDING)
+    contact      = models.BooleanField(default=False)
+    archived_on  = models.DateField()
+
+    class Meta:
+        db_table = "archived_details_table"
+        indexes = [
+            models.Index(fields=["history_id"], name="ix_archived_history"),
+            models.Index(fields=["site_id", "isbn"], name="ix_archived_site_isbn"),
+            models.Index(fields=["date_scraped"], name="ix_archived_date_scraped"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class UnrelatedUrl(models.Model):
+    """Listings whose detail page didn't match the searched ISBN (written by the scraper)."""
+    unrelated_id = models.AutoField(primary_key=True)
+    site_id      = models.IntegerField()
+    search_term  = models.CharField(max_length=255)
+    url          = models.TextField()
+    date_added   = models.DateField(auto_now_add=True)
+
+    class Meta:
+        db_table = "unrelated_urls_table"
+        constraints = [
+            models.UniqueConstraint(fields=["site_id", "search_term", "url"], name="uq_unrelated_site_term_url")
+        ]
+        indexes = [models.Index(fields=["date_added"], name="ix_unrelated_date_added")]
+
+    def __str__(self):
+        return f"{self.search_term} - {self.url}"
+
+
+class Summary(models.Model):
+    """
+    Per-site stats of every ISBN and seller, rebuilt from details_table by the
+    scraper when a spider closes. price_sum lets averages be recombined across sites.
+    """
+    ISBN   = "isbn"
+    SELLER = "seller"
+
+    summary_id      = models.AutoField(primary_key=True)
+    site_id         = models.IntegerField()
+    group_by        = models.CharField(max_length=10)
+    group_key       = models.TextField()
+    available_books = models.IntegerField(default=0)
+    sold_books      = models.IntegerField(default=0)
+    price_sum       = models.FloatField(default=0)
+    avg_price       = models.FloatField(null=True)
+    min_price       = models.FloatField(null=True)
+    max_price       = models.FloatField(null=True)
+    rotation_rate   = models.FloatField(default=0)
+    updated_on      = models.DateField()
+
+    class Meta:
+        db_table = "summary_table"
+        constraints = [
+            models.UniqueConstraint(fields=["site_id", "group_by", "group_key"], name="uq_summary_site_group_key")
+        ]
+        indexes = [models.Index(fields=["group_by", "group_key"], name="ix_summary_group_key")]
+
+    def __str__(self):
+        return f"{self.group_by} {self.group_key} - {self.site_id}"
+
+
+class PriceObservation(models.Model):
+    """
+    Append-only price history: one row per listing and day on which the
+    scraper first saw it or saw its price change. isbn is copied from the
+    detail so per-ISBN series are one index range scan.
+    """
+    observation_id = models.AutoField(primary_key=True)
+    detail_id      = models.IntegerField()
+    isbn           = models.CharField(max_length=255)
+    observed_on    = models.DateField()
+    price          = models.FloatField()
+
+    class Meta:
+        db_table = "price_history_table"
+        constraints = [
+            models.UniqueConstraint(fields=["detail_id", "observed_on"], name="uq_price_detail_date")
+        ]
+        indexes = [models.Index(fields=["isbn", "observed_on", "price"], name="ix_price_isbn_date")]
+
+    def __str__(self):
+        return f"{self.isbn} {self.observed_on}: {self.price}"
+
+
+class CacheVersion(models.Model):
+    """
+    Generation counter of the API response cache. Bumped by the scraper when a
+    spider closes and by the write endpoints; cached responses of an older
+    version are never served.
+    """
+    RESPONSES = "responses"
+
+    name    = models.CharField(max_length=50, primary_key=True)
+    version = models.IntegerField(default=1)
+
+    class Meta:
+        db_table = "cache_version_table"
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"{self.name} v{self.version}"
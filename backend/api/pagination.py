@@ -0,0 +1,89 @@
+import base64
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE     = 200
+
+# ?sort= values and their keyset ordering; detail_id breaks ties so positions are unique
+SORT_ORDERINGS = {
+    "first_seen":  ["first_seen", "detail_id"],
+    "-first_seen": ["-first_seen", "-detail_id"],
+    "price":       ["price", "detail_id"],
+    "-price":      ["-price", "-detail_id"],
+}
+DEFAULT_SORT = "-first_seen"
+
+
+def get_page_size(request) -> int:
+    """?limit= clamped to [1, MAX_PAGE_SIZE]; raises ValueError when not an integer."""
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError as exc:
+        raise ValueError("limit must be an integer.") from exc
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def get_ordering(request) -> list[str]:
+    """Keyset ordering for ?sort=; raises ValueError for unsupported values."""
+    sort = request.GET.get("sort") or DEFAULT_SORT
+    if sort not in SORT_ORDERINGS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_ORDERINGS)}.")
+    return SORT_ORDERINGS[sort]
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """Raises ValueError for anything that is not a cursor produced by encode_cursor()."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as exc:
+        raise ValueError("Invalid cursor.") from exc
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor.")
+    return values
+
+
+def keyset_filter(ordering: list[str], values: list) -> Q:
+    """
+    Rows strictly after `values` in `ordering`, e.g. for ["isbn", "detail_id"]:
+        isbn > v0  OR  (isbn = v0 AND detail_id > v1)
+    A leading "-" marks a descending field.
+    """
+    if len(values) != len(ordering):
+        raise ValueError("Invalid cursor.")
+
+    query = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        clause = Q(**{f"{name}__{lookup}": values[i]})
+        for previous, value in zip(ordering[:i], values):
+            clause &= Q(**{previous.lstrip("-"): value})
+        query |= clause
+    return query
+
+
+def keyset_paginate(queryset, ordering: list[str], cursor: str | None, limit: int):
+    """
+    Returns (rows, next_cursor) for the page after `cursor`. `ordering` as a
+    whole must be unique (ending in detail_id, or a group key for grouped rows)
+    so every row has a distinct position.
+    """
+    if cursor:
+        queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor)))
+
+    rows = list(queryset.order_by(*ordering)[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    get = last.get if isinstance(last, dict) else lambda name: getattr(last, name)
+    return rows, encode_cursor([get(field.lstrip("-")) for field in ordering])
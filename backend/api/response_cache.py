@@ -0,0 +1,66 @@
+import hashlib
+from functools import wraps
+
+from django.core.cache import caches
+from django.db.models import F
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import CacheVersion
+from .services import LIST_FILTER_PARAMS
+
+CACHE_ALIAS = "responses"  # see CACHES in backend/settings.py
+
+
+def get_cache_version() -> int:
+    version = (
+        CacheVersion.objects.filter(name=CacheVersion.RESPONSES).values_list("version", flat=True).first()
+    )
+    return version or 1
+
+def bump_cache_version() -> None:
+    """Invalidate every cached response (called after writes to details_table)."""
+    updated = CacheVersion.objects.filter(name=CacheVersion.RESPONSES).update(version=F("version") + 1)
+    if not updated:
+        CacheVersion.objects.get_or_create(name=CacheVersion.RESPONSES, defaults={"version": 2})
+
+def response_cache_key(endpoint: str, request) -> str:
+    """
+    `endpoint` + the normalized query string: parameters sorted, empty ones
+    dropped and comma lists of LIST_FILTER_PARAMS sorted, so
+    "?domains=b,a&limit=5" and "?limit=5&domains=a,b&sort=" share an entry.
+    """
+    parts = []
+    for name in sorted(request.GET):
+        for value in sorted(request.GET.getlist(name)):
+            value = value.strip()
+            if name in LIST_FILTER_PARAMS:
+                value = ",".join(sorted(v for v in value.split(",") if v))
+            if value:
+                parts.append(f"{name}={value}")
+    digest = hashlib.md5("&".join(parts).encode()).hexdigest()
+    return f"{endpoint}:{digest}"
+
+def cached_response(view):
+    """
+    Cache the 200 responses of a read-only view (placed under @api_view).
+    Entries are stored under the current CacheVersion, so bumping it drops
+    them all at once; anonymous requests always reach the view's login guard.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        cache = caches[CACHE_ALIAS]
+        key = response_cache_key(view.__name__, request)
+        version = get_cache_version()
+        if (data := cache.get(key, version=version)) is not None:
+            return Response(data)
+
+        response = view(request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, version=version)
+        return response
+
+    return wrapper
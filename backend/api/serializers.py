@@ -30,6 +30,30 @@ class DetailSerializer(serializers.ModelSerializer):
         return ""
 
 
+def serialize_detail_rows(rows) -> list[dict]:
+    """
+    DetailSerializer's output for rows from services.detail_values(): same
+    keys, order and formatting, without a DRF field pass per value.
+    """
+    return [
+        {
+            "detail_id":    row["detail_id"],
+            "image":        row["image"] or "",
+            "isbn":         row["isbn"],
+            "name":         row["name"],
+            "price":        row["price"],
+            "condition":    row["condition"],
+            "seller":       row["seller"],
+            "url":          row["url"],
+            "date_scraped": row["date_scraped"].isoformat() if row["date_scraped"] else None,
+            "first_seen":   row["first_seen"].isoformat() if row["first_seen"] else None,
+            "interest":     row["interest"],
+            "contact":      row["contact"],
+        }
+        for row in rows
+    ]
+
+
 class InterestUpdateSerializer(serializers.Serializer):
     """
     Validates the payload for PATCH /api/interest/<detail_id>/
@@ -41,4 +65,29 @@ class InterestUpdateSerializer(serializers.Serializer):
     """
     interest = serializers.ChoiceField(
         choices=[Detail.PENDING, Detail.INTERESTED, Detail.NOT_INTERESTED]
-    )
\ No newline at end of file
+    )
+
+
+class BulkUpdateSerializer(serializers.Serializer):
+    """
+    Validates the payload for PATCH /api/bulk_update/
+
+    Target rows:  "ids" (list of detail_id)  or  "filters" (get_details() query
+                  params as strings, plus an optional "isbn" / "seller" group key)
+    New values:   "interest" and/or "contact"
+    """
+    MAX_ROWS = 1000
+
+    ids      = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=MAX_ROWS)
+    filters  = serializers.DictField(child=serializers.CharField(allow_blank=True), required=False)
+    interest = serializers.ChoiceField(
+        choices=[Detail.PENDING, Detail.INTERESTED, Detail.NOT_INTERESTED], required=False
+    )
+    contact  = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filters" in attrs):
+            raise serializers.ValidationError("Provide either ids or filters.")
+        if "interest" not in attrs and "contact" not in attrs:
+            raise serializers.ValidationError("Provide interest and/or contact.")
+        return attrs
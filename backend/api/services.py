@@ -1,10 +1,33 @@
+from collections import defaultdict
 from datetime import timedelta
-from django.db.models import Q
+from django.db import connections
+from django.db.models import (
+    Q, F, Avg, Min, Max, Count, Sum, FloatField, ExpressionWrapper, Value, TextField, OuterRef, Subquery,
+)
+from django.db.models.fields.json import KT
+from django.db.models.functions import Coalesce, Floor, Least
 from django.utils import timezone
 from rest_framework.request import Request
-from .models import Source, History, Detail
+from .models import Source, History, Detail, ArchivedDetail, Summary, PriceObservation
 
-def get_details(request: Request):
+# Query params understood by get_details(); list-valued ones are order-insensitive
+FILTER_PARAMS      = ("domains", "min_price", "max_price", "condition", "days_old", "interest", "contact")
+LIST_FILTER_PARAMS = ("domains", "condition")
+# Filters that select individual detail rows; without them the stored summaries apply
+ROW_FILTER_PARAMS  = ("min_price", "max_price", "condition", "days_old", "interest", "contact")
+# Facets of get_filter_facets(); prices are bucketed PRICE_BUCKET_WIDTH wide, the last bucket is open-ended
+FACET_FIELDS        = ("condition", "site_id", "interest", "contact", "price_bucket")
+PRICE_BUCKET_WIDTH  = 5
+PRICE_BUCKET_CAP    = 100
+# Columns serialize_detail_rows() reads, besides the extracted first image
+DETAIL_VALUE_FIELDS = (
+    "detail_id", "isbn", "name", "price", "condition", "seller", "url", "date_scraped", "first_seen",
+    "interest", "contact",
+)
+# First image of a row extracted in SQL (images ->> 0 on Postgres, json_extract on SQLite), "" when none
+FIRST_IMAGE = Coalesce(KT("images__0"), Value(""), output_field=TextField())
+
+def get_details(request: Request, params=None):
     """
     Returns a (detail_qs, history_qs) tuple filtered by all active query params:
         domains      — comma-separated spider_name values
@@ -14,35 +37,46 @@ def get_details(request: Request):
         days_old     — integer
         interest     — "pending" | "interested" | "not_interested"
         contact      — "true" | "false"
+
+    `params` replaces request.GET as the source of those filters (e.g. a JSON body).
+
+    Detail rows are filtered on their own site_id column, so the domain filter
+    is a single semi-join against source_table instead of nested history subqueries.
     """
+    params = request.GET if params is None else params
+
     # Domain filter
-    if domains := request.GET.get("domains", ""):
-        query = Q()
-        for domain in domains.split(","):
-            query |= Q(spider_name=domain)
-        ids = Source.objects.filter(query).values_list("spider_id", flat=True)
+    if domains := params.get("domains", ""):
+        ids     = Source.objects.filter(spider_name__in=domains.split(",")).values("spider_id")
+        history = History.objects.filter(site_id__in=ids)
     else:
-        ids = Source.objects.all().values_list("spider_id", flat=True)
+        history = History.objects.all()
+
+    return filter_rows(Detail.objects.all(), params), history
 
-    history = History.objects.filter(site_id__in=ids)
-    detail  = Detail.objects.filter(history_id__in=history.values_list("history_id", flat=True))
+def get_archived_details(request: Request, params=None):
+    """ArchivedDetail rows (sold listings moved out of details_table) under the get_details() filters."""
+    return filter_rows(ArchivedDetail.objects.all(), request.GET if params is None else params)
+
+def filter_rows(detail, params):
+    """The get_details() filters applied to `detail` (a Detail or ArchivedDetail queryset)."""
+    # Domain filter
+    if domains := params.get("domains", ""):
+        detail = detail.filter(site_id__in=Source.objects.filter(spider_name__in=domains.split(",")).values("spider_id"))
 
     # Price filters
-    if min_price := request.GET.get("min_price", None):
+    if min_price := params.get("min_price", None):
         detail = detail.filter(price__gte=float(min_price))
-    if max_price := request.GET.get("max_price", None):
+    if max_price := params.get("max_price", None):
         detail = detail.filter(price__lte=float(max_price))
 
     # Condition filter
-    if conditions := request.GET.get("condition", ""):
+    if conditions := params.get("condition", ""):
         if conditions != "All":
-            query = Q()
-            for condition in conditions.split(","):
-                query |= Q(condition=condition)
-            detail = detail.filter(query)
+            detail = detail.filter(condition__in=conditions.split(","))
 
     # Days-old filter
-    if (days_old_raw := request.GET.get("days_old")) is not None:
+    if (days_old_raw := params.get("days_old")) is not None:
         days_old = int(days_old_raw)
         cutoff_date = timezone.now().date() - timedelta(days=days_old)
         if days_old == 1:
@@ -51,19 +85,111 @@ def get_details(request: Request):
             detail = detail.filter(first_seen__gte=cutoff_date)
 
     # Interest filter
-    if interest := request.GET.get("interest", ""):
+    if interest := params.get("interest", ""):
         valid = {Detail.PENDING, Detail.INTERESTED, Detail.NOT_INTERESTED}
         if interest in valid:
             detail = detail.filter(interest=interest)
 
     # Contact filter
-    if contact := request.GET.get("contact", ""):
+    if contact := params.get("contact", ""):
         if contact.lower() == "true":
             detail = detail.filter(contact=True)
         elif contact.lower() == "false":
             detail = detail.filter(contact=False)
 
-    return detail, history
+    return detail
+
+def group_summary_queryset(detail, group_by: str, archived=None):
+    """
+    Per-group stats of the filtered queryset as one grouped query (rows are
+    dicts). Only groups with at least one available book are returned.
+    Rows of `archived` (get_archived_details()) count as sold, as they do in
+    summary_table.
+    """
+    available = Q(availability=True)
+    sold_count = Count("detail_id", filter=Q(availability=False))
+    if archived is not None:
+        archived_sold = (
+            archived.filter(**{group_by: OuterRef(group_by)})
+            .order_by()
+            .values(group_by)
+            .annotate(count=Count("detail_id"))
+            .values("count")
+        )
+        sold_count = sold_count + Coalesce(Subquery(archived_sold), 0)
+
+    return (
+        detail.values(group_by)
+        .annotate(
+            avg_price=Avg("price", filter=available),
+            min_price=Min("price", filter=available),
+            max_price=Max("price", filter=available),
+            available_count=Count("detail_id", filter=available),
+            sold_count=sold_count,
+        )
+        .filter(available_count__gt=0)
+        .order_by(group_by)
+    )
+
+def detail_values(detail):
+    """
+    Rows of `detail` as dicts of DETAIL_VALUE_FIELDS + "image". The first image
+    is extracted in SQL (images ->> 0 on Postgres, json_extract on SQLite), so
+    the images column is never loaded or parsed in Python.
+    """
+    return detail.values(*DETAIL_VALUE_FIELDS, image=FIRST_IMAGE)
+
+def has_row_filters(request: Request) -> bool:
+    for name in ROW_FILTER_PARAMS:
+        value = request.GET.get(name, "")
+        if value and not (name == "condition" and value == "All"):
+            return True
+    return False
+
+def stored_summary_queryset(request: Request, group_by: str):
+    """
+    group_summary_queryset() read from summary_table instead of details_table:
+    the per-site rows of each group are recombined (averages via price_sum).
+    Only valid when has_row_filters() is False; rows are as fresh as the last
+    spider close of each site.
+    """
+    summaries = Summary.objects.filter(group_by=group_by)
+    if domains := request.GET.get("domains", ""):
+        summaries = summaries.filter(
+            site_id__in=Source.objects.filter(spider_name__in=domains.split(",")).values("spider_id")
+        )
+
+    return (
+        summaries.values(**{group_by: F("group_key")})
+        .annotate(
+            available_count=Sum("available_books"),
+            sold_count=Sum("sold_books"),
+            min_price=Min("min_price"),
+            max_price=Max("max_price"),
+            avg_price=ExpressionWrapper(Sum("price_sum") / Sum("available_books"), output_field=FloatField()),
+        )
+        .filter(available_count__gt=0)
+        .order_by(group_by)
+    )
+
+def summary_queryset(request: Request, detail, group_by: str):
+    """Stored summaries when only domains are filtered, live aggregates otherwise."""
+    if has_row_filters(request):
+        return group_summary_queryset(detail, group_by, get_archived_details(request))
+    return stored_summary_queryset(request, group_by)
+
+def format_group_summary(group_by: str, key, agg: dict) -> dict:
+    total_available = agg.get("available_count", 0)
+    sold_count = agg.get("sold_count", 0)
+    return {
+        group_by.capitalize(): key,
+        "Available Books": total_available,
+        "Books Sold": sold_count,
+        "Average Rotation (%)": f"{round((sold_count / (total_available or 1)) * 100, 2)}%",
+        "Average Price": round(agg.get("avg_price") or 0, 2),
+        "Minimum Price": round(agg.get("min_price") or 0, 2),
+        "Maximum Price": round(agg.get("max_price") or 0, 2),
+    }
 
 def update_interest(detail_id: int, interest_value: str) -> Detail:
     detail = Detail.objects.get(pk=detail_id)
@@ -71,6 +197,178 @@ def update_interest(detail_id: int, interest_value: str) -> Detail:
     detail.save(update_fields=["interest"])
     return detail
 
+def group_marketplaces(spider_names) -> dict:
+    """{"wallapop": ["libros", "comics"], ...} from spider names like "wallapop_libros"."""
+    groups = defaultdict(list)
+    for name in spider_names:
+        base = next(iter(name.split("_")))
+        groups[base].append(name.replace(base + "_", ""))
+    return groups
+
+def facet_counts(detail) -> list[tuple]:
+    """
+    One grouped query over the filtered rows: (facet index, value, count,
+    min price, max price) per value of every FACET_FIELDS entry, plus a
+    (len(FACET_FIELDS), None, total, min, max) row for the whole set.
+    Postgres computes all groupings in one pass with GROUPING SETS; SQLite
+    groups by every facet column together and the counts are summed here.
+    """
+    rows = (
+        detail.annotate(price_bucket=Least(Floor(F("price") / PRICE_BUCKET_WIDTH) * PRICE_BUCKET_WIDTH,
+                                           Value(float(PRICE_BUCKET_CAP))))
+        .values(*FACET_FIELDS, "price")
+        .order_by()
+    )
+    connection = connections[rows.db]
+    inner_sql, params = rows.query.get_compiler(using=rows.db).as_sql()
+    columns = [f"d.{connection.ops.quote_name(field)}" for field in FACET_FIELDS]
+    price = f"d.{connection.ops.quote_name('price')}"
+    aggregates = f"COUNT(*), MIN({price}), MAX({price})"
+
+    if connection.vendor == "postgresql":
+        # GROUPING() has a 1-bit per column left out of the grouping set, first column highest
+        full_mask = (1 << len(FACET_FIELDS)) - 1
+        facet_index = {full_mask ^ (1 << (len(FACET_FIELDS) - 1 - i)): i for i in range(len(FACET_FIELDS))}
+        facet_index[full_mask] = len(FACET_FIELDS)
+        sql = (
+            f"SELECT GROUPING({', '.join(columns)}), {', '.join(columns)}, {aggregates} "
+            f"FROM ({inner_sql}) d "
+            f"GROUP BY GROUPING SETS ({', '.join(f'({column})' for column in columns)}, ())"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        results = []
+        for grouping, *values, count, group_min, group_max in rows:
+            index = facet_index[grouping]
+            value = values[index] if index < len(FACET_FIELDS) else None
+            results.append((index, value, count, group_min, group_max))
+        return results
+
+    # SQLite has no GROUPING SETS and a UNION ALL over a CTE re-sorts the rows once
+    # per facet; group by every facet column at once and fold the (small) set of
+    # combinations per facet here instead
+    sql = f"SELECT {', '.join(columns)}, {aggregates} FROM ({inner_sql}) d GROUP BY {', '.join(columns)}"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        combinations = cursor.fetchall()
+
+    groups = [{} for _ in FACET_FIELDS] + [{None: [0, None, None]}]
+    for *values, count, group_min, group_max in combinations:
+        for index, value in [*enumerate(values), (len(FACET_FIELDS), None)]:
+            group = groups[index].setdefault(value, [0, None, None])
+            group[0] += count
+            if group_min is not None:
+                group[1] = group_min if group[1] is None else min(group[1], group_min)
+                group[2] = group_max if group[2] is None else max(group[2], group_max)
+    return [
+        (index, value, count, group_min, group_max)
+        for index, group in enumerate(groups)
+        for value, (count, group_min, group_max) in group.items()
+    ]
+
+def get_filter_facets(detail) -> dict:
+    """
+    Everything the dashboard's filter controls need for the filtered queryset,
+    from facet_counts() plus one source_table lookup: price bounds (None when
+    empty), conditions, counts per condition / spider_name / interest /
+    contact, a price histogram and the marketplace groups.
+    """
+    spider_names = dict(Source.objects.values_list("spider_id", "spider_name"))
+    counts = {field: {} for field in FACET_FIELDS}
+    total, min_price, max_price = 0, None, None
+    for index, value, count, group_min, group_max in facet_counts(detail):
+        if index == len(FACET_FIELDS):
+            total, min_price, max_price = count, group_min, group_max
+        else:
+            counts[FACET_FIELDS[index]][value] = count
+
+    condition_counts = dict(sorted(counts["condition"].items()))
+    return {
+        "total": total,
+        "min_price": min_price,
+        "max_price": max_price,
+        "conditions": sorted([*condition_counts, "All"]),
+        "condition_counts": condition_counts,
+        "domain_counts": {
+            spider_names[site_id]: count for site_id, count in counts["site_id"].items() if site_id in spider_names
+        },
+        "interest_counts": counts["interest"],
+        # scraper-created tables allow NULL contact, which the contact=false filter doesn't match
+        "contact_counts": {
+            "null" if value is None else str(bool(value)).lower(): count for value, count in counts["contact"].items()
+        },
+        "price_histogram": [
+            {
+                "from": int(bucket),
+                "to": int(bucket) + PRICE_BUCKET_WIDTH if bucket < PRICE_BUCKET_CAP else None,
+                "count": count,
+            }
+            for bucket, count in sorted(counts["price_bucket"].items())
+        ],
+        "marketplaces": group_marketplaces(spider_names.values()),
+    }
+
+def get_price_series(isbns: list[str], start, end, points: int) -> dict:
+    """
+    Downsampled price series per ISBN between `start` and `end` (dates,
+    inclusive): the range is split into at most `points` equal buckets of
+    whole days and each bucket reports min / max / average of the prices
+    observed in it (first sightings and price changes, see PriceObservation).
+    Empty buckets are left out.
+
+    The database returns one row per ISBN and day from an (isbn, observed_on)
+    index range scan; days are merged into buckets here.
+    """
+    days = (end - start).days + 1
+    bucket_days = -(-days // points)  # ceil
+
+    daily = (
+        PriceObservation.objects.filter(isbn__in=isbns, observed_on__range=(start, end))
+        .values("isbn", "observed_on")
+        .annotate(min_price=Min("price"), max_price=Max("price"), price_sum=Sum("price"), count=Count("price"))
+        .order_by("isbn", "observed_on")
+    )
+
+    buckets = defaultdict(dict)
+    for row in daily:
+        bucket_start = start + timedelta(days=(row["observed_on"] - start).days // bucket_days * bucket_days)
+        bucket = buckets[row["isbn"]].setdefault(
+            bucket_start, {"min_price": row["min_price"], "max_price": row["max_price"], "price_sum": 0, "count": 0}
+        )
+        bucket["min_price"] = min(bucket["min_price"], row["min_price"])
+        bucket["max_price"] = max(bucket["max_price"], row["max_price"])
+        bucket["price_sum"] += row["price_sum"]
+        bucket["count"] += row["count"]
+
+    return {
+        isbn: [
+            {
+                "date": bucket_start.isoformat(),
+                "avg_price": round(bucket["price_sum"] / bucket["count"], 2),
+                "min_price": bucket["min_price"],
+                "max_price": bucket["max_price"],
+                "observations": bucket["count"],
+            }
+            for bucket_start, bucket in buckets.get(isbn, {}).items()
+        ]
+        for isbn in isbns
+    }
+
+def bulk_update_details(detail, values: dict, limit: int) -> list[int]:
+    """
+    Apply `values` (interest and/or contact) to the rows of `detail` with one
+    UPDATE ... WHERE detail_id IN (...). Returns the updated ids; raises
+    ValueError when more than `limit` rows match.
+    """
+    ids = list(detail.order_by("detail_id").values_list("detail_id", flat=True)[:limit + 1])
+    if len(ids) > limit:
+        raise ValueError(f"More than {limit} details match; narrow the filters.")
+    if ids:
+        Detail.objects.filter(detail_id__in=ids).update(**values)
+    return ids
+
 def update_contact(detail_id: int, contact_value: bool) -> Detail:
     detail = Detail.objects.get(pk=detail_id)
     detail.contact = contact_value
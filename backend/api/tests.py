@@ -1,3 +1,438 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, RequestFactory
+
+from .models import Source, History, Detail, ArchivedDetail, Summary, PriceObservation, UnrelatedUrl
+from .response_cache import CACHE_ALIAS, response_cache_key
+from .serializers import DetailSerializer, serialize_detail_rows
+from .services import get_details, has_row_filters, stored_summary_queryset, detail_values, get_filter_facets, FACET_FIELDS
+
+
+class GetDetailsQueryTests(TestCase):
+    """
+    Shape and plan of the get_details() filter chain. EXPLAIN runs against the
+    configured database: PostgreSQL in production, SQLite as a local stand-in
+    (DATABASE_URL=sqlite:///db.sqlite3 python manage.py test api.tests).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.wallapop = Source.objects.create(spider_name="wallapop_high", spider_domain="es.wallapop.com")
+        cls.vinted   = Source.objects.create(spider_name="vinted_high", spider_domain="www.vinted.es")
+
+        for source in (cls.wallapop, cls.vinted):
+            history = History.objects.create(site_id=source, isbn="9788408000000")
+            for n, condition in enumerate(["Nuevo", "Usado", "Como nuevo"]):
+                Detail.objects.create(
+                    history=history, isbn=history.isbn, site_id=source.spider_id, name=f"Book {n}",
+                    price=10 + n, seller=f"seller{n}", condition=condition, editorial="", images=[],
+                    url=f"https://{source.spider_domain}/item/{n}",
+                    interest=Detail.INTERESTED if n == 0 else Detail.PENDING,
+                )
+
+    def filtered(self, **params):
+        detail, _ = get_details(RequestFactory().get("/", params))
+        return detail
+
+    def explain(self, queryset) -> str:
+        if connection.vendor == "postgresql":
+            # Tiny test tables always favour a seq scan; make the planner show its index choice
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def assertUsesIndex(self, plan: str, index_name: str):
+        if connection.vendor == "postgresql":
+            self.assertRegex(plan, rf"(Index (Only )?Scan using|Bitmap Index Scan on) {index_name}")
+        else:
+            self.assertRegex(plan, rf"USING (COVERING )?INDEX {index_name}")
+
+    def test_domain_filter_does_not_nest_history_subqueries(self):
+        sql = str(self.filtered(domains="wallapop_high").query)
+        self.assertNotIn("history_table", sql)
+        self.assertEqual(sql.count("SELECT"), 2)  # details + one source_table semi-join
+
+    def test_condition_filter_is_a_single_in_list(self):
+        detail = self.filtered(condition="Nuevo,Usado")
+        self.assertIn('"condition" IN', str(detail.query))
+        self.assertEqual(detail.count(), 4)
+
+    def test_filters_select_expected_rows(self):
+        detail = self.filtered(domains="vinted_high", condition="Usado", min_price="10", max_price="20")
+        self.assertEqual(list(detail.values_list("url", flat=True)), ["https://www.vinted.es/item/1"])
+
+    def test_scraper_site_isbn_lookup_uses_composite_index(self):
+        # mark_urls_unavailable()'s lookup; with availability=True Postgres may pick ix_details_avail_isbn instead
+        detail = Detail.objects.filter(site_id=self.vinted.spider_id, isbn="9788408000000")
+        self.assertUsesIndex(self.explain(detail), "ix_details_site_isbn_avail")
+
+    def test_days_old_filter_uses_first_seen_index(self):
+        self.assertUsesIndex(self.explain(self.filtered(days_old="7")), "ix_details_first_seen")
+
+    def test_available_group_rows_use_partial_index(self):
+        detail = self.filtered().filter(availability=True, isbn="9788408000000").order_by("isbn", "detail_id")
+        self.assertUsesIndex(self.explain(detail), "ix_details_avail_isbn")
+
+    def test_lean_serialization_matches_detail_serializer(self):
+        Detail.objects.filter(name="Book 0").update(images=["https://img/0.jpg", "https://img/1.jpg"])
+        detail = Detail.objects.order_by("detail_id")
+        self.assertEqual(
+            serialize_detail_rows(detail_values(detail)),
+            [dict(row) for row in DetailSerializer(detail, many=True).data],
+        )
+
+    def test_filter_facets(self):
+        detail = self.filtered(domains="vinted_high", min_price="11")
+        with self.assertNumQueries(2):  # source_table + one grouped facets query
+            facets = get_filter_facets(detail)
+        self.assertEqual((facets["total"], facets["min_price"], facets["max_price"]), (2, 11, 12))
+        self.assertEqual(facets["conditions"], ["All", "Como nuevo", "Usado"])
+        self.assertEqual(facets["condition_counts"], {"Como nuevo": 1, "Usado": 1})
+        self.assertEqual(facets["domain_counts"], {"vinted_high": 2})
+        self.assertEqual(facets["interest_counts"], {Detail.PENDING: 2})
+        self.assertEqual(facets["contact_counts"], {"false": 2})
+        self.assertEqual(facets["price_histogram"], [{"from": 10, "to": 15, "count": 2}])
+        self.assertEqual(facets["marketplaces"], {"wallapop": ["high"], "vinted": ["high"]})
+
+    def test_filter_facets_keep_null_contact_apart(self):
+        contact = FACET_FIELDS.index("contact")
+        rows = [(contact, None, 1, 10, 10), (contact, False, 2, 11, 12), (len(FACET_FIELDS), None, 3, 10, 12)]
+        with mock.patch("api.services.facet_counts", return_value=rows):
+            facets = get_filter_facets(self.filtered())
+        self.assertEqual(facets["contact_counts"], {"null": 1, "false": 2})
+
+    def test_filter_facets_of_empty_set(self):
+        facets = get_filter_facets(self.filtered(min_price="100"))
+        self.assertEqual((facets["min_price"], facets["max_price"], facets["conditions"]), (None, None, ["All"]))
+
+    def test_interest_filter_uses_index(self):
+        index_name = next(
+            name for name, info in connection.introspection.get_constraints(connection.cursor(), "details_table").items()
+            if info["index"] and info["columns"] == ["interest"]
+        )
+        plan = self.explain(self.filtered(interest=Detail.INTERESTED))
+        self.assertUsesIndex(plan, index_name)
+
+
+class StoredSummaryTests(TestCase):
+    """Recombination of the per-site rows the scraper writes to summary_table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.wallapop = Source.objects.create(spider_name="wallapop_high", spider_domain="es.wallapop.com")
+        cls.vinted   = Source.objects.create(spider_name="vinted_high", spider_domain="www.vinted.es")
+        for source, available, sold, prices in ((cls.wallapop, 2, 1, (10, 20)), (cls.vinted, 1, 3, (40,))):
+            Summary.objects.create(
+                site_id=source.spider_id, group_by=Summary.ISBN, group_key="9788408000000",
+                available_books=available, sold_books=sold, price_sum=sum(prices),
+                avg_price=sum(prices) / len(prices), min_price=min(prices), max_price=max(prices),
+                rotation_rate=sold * 100 / available, updated_on=date.today(),
+            )
+        Summary.objects.create(
+            site_id=cls.vinted.spider_id, group_by=Summary.ISBN, group_key="9788408000001",
+            available_books=0, sold_books=2, updated_on=date.today(),
+        )
+
+    def summaries(self, **params):
+        return list(stored_summary_queryset(RequestFactory().get("/", params), Summary.ISBN))
+
+    def test_sites_are_recombined_per_group(self):
+        (row,) = self.summaries()
+        self.assertEqual(row["isbn"], "9788408000000")
+        self.assertEqual((row["available_count"], row["sold_count"]), (3, 4))
+        self.assertEqual((row["min_price"], row["max_price"]), (10, 40))
+        self.assertAlmostEqual(row["avg_price"], 70 / 3)
+
+    def test_domain_filter_selects_sites(self):
+        (row,) = self.summaries(domains="vinted_high")
+        self.assertEqual((row["available_count"], row["avg_price"]), (1, 40))
+
+    def test_only_row_level_filters_bypass_summaries(self):
+        self.assertFalse(has_row_filters(RequestFactory().get("/", {"domains": "vinted_high", "condition": "All"})))
+        self.assertTrue(has_row_filters(RequestFactory().get("/", {"condition": "Nuevo"})))
+
+
+class ArchivedSoldTests(TestCase):
+    """Archived sold rows count as sold on the live paths, as they do in summary_table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        source = Source.objects.create(spider_name="vinted_high", spider_domain="www.vinted.es")
+        history = History.objects.create(site_id=source, isbn="9788408000000")
+        for detail_id, seller, price, availability in ((1, "ana", 10, True), (2, "ana", 20, False)):
+            Detail.objects.create(
+                detail_id=detail_id, history=history, isbn=history.isbn, site_id=source.spider_id, name="Book",
+                price=price, seller=seller, condition="Nuevo", editorial="", images=[], availability=availability,
+                url=f"https://www.vinted.es/item/{detail_id}",
+            )
+        for detail_id, seller, price in ((3, "ana", 30), (4, "luis", 40)):
+            ArchivedDetail.objects.create(
+                detail_id=detail_id, history_id=history.history_id, isbn=history.isbn, site_id=source.spider_id,
+                date_scraped=date.today() - timedelta(days=60), first_seen=date.today() - timedelta(days=90),
+                name="Book", price=price, seller=seller, condition="Nuevo", editorial="", images=[],
+                url=f"https://www.vinted.es/item/{detail_id}", archived_on=date.today(),
+            )
+        User.objects.create_user("dashboard", password="dashboard")
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        self.client.login(username="dashboard", password="dashboard")
+
+    def test_live_group_summaries_count_archived_rows(self):
+        response = self.client.get("/api/all_filtered_results/", {"summary": "true", "condition": "Nuevo"})
+        (row,) = response.json()["results"]
+        self.assertEqual((row["Available Books"], row["Books Sold"]), (1, 3))
+
+    def test_archived_rows_follow_the_row_filters(self):
+        response = self.client.get("/api/all_filtered_results/", {"summary": "true", "min_price": "35"})
+        self.assertEqual(response.json()["results"], [])  # no available row left in the group
+        response = self.client.get("/api/all_filtered_results/", {"summary": "true", "max_price": "30"})
+        self.assertEqual(response.json()["results"][0]["Books Sold"], 2)
+
+    def test_main_stats_count_archived_rows(self):
+        stats = self.client.get("/api/main_stats/").json()
+        self.assertEqual((stats["Total Books"], stats["Hot Books"], stats["Sold Books"]), (4, 1, 3))
+        self.assertEqual(stats["Unique Sellers"], 2)
+        self.assertEqual(stats["Average Price"], 25)
+        self.assertEqual(stats["Rotation Rate"], "75.0 %")
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        source = Source.objects.create(spider_name="vinted_high", spider_domain="www.vinted.es")
+        history = History.objects.create(site_id=source, isbn="9788408000000")
+        cls.detail = Detail.objects.create(
+            history=history, isbn=history.isbn, site_id=source.spider_id, name="Book", price=10,
+            seller="seller", condition="Nuevo", editorial="", images=[], url="https://www.vinted.es/item/1",
+        )
+        User.objects.create_user("dashboard", password="dashboard")
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        self.client.login(username="dashboard", password="dashboard")
+
+    def test_query_string_is_normalized(self):
+        factory = RequestFactory()
+        self.assertEqual(
+            response_cache_key("main_stats", factory.get("/", {"domains": "b,a", "limit": "5"})),
+            response_cache_key("main_stats", factory.get("/", {"limit": "5", "domains": "a,b", "sort": ""})),
+        )
+
+    def test_interest_update_invalidates_cached_stats(self):
+        url = "/api/main_stats/?interest=interested"
+        self.assertEqual(self.client.get(url).json()["Total Books"], 0)
+        with self.assertNumQueries(3):  # session, user, cache version
+            self.client.get(url)
+
+        self.client.patch(
+            f"/api/interest/{self.detail.detail_id}/", {"interest": Detail.INTERESTED}, content_type="application/json"
+        )
+        self.assertEqual(self.client.get(url).json()["Total Books"], 1)
+
+    def test_database_errors_are_not_cached(self):
+        with mock.patch("api.views.get_details", side_effect=DatabaseError("connection lost")):
+            self.assertEqual(self.client.get("/api/main_stats/").status_code, 503)
+        self.assertEqual(self.client.get("/api/main_stats/").json()["Total Books"], 1)
+        self.assertEqual(self.client.get("/api/main_stats/", {"min_price": "x"}).status_code, 400)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        source = Source.objects.create(spider_name="vinted_high", spider_domain="www.vinted.es")
+        history = History.objects.create(site_id=source, isbn="9788408000000")
+        for n in range(3):
+            Detail.objects.create(
+                history=history, isbn=history.isbn, site_id=source.spider_id, name=f"Book {n}", price=10 + n,
+                seller="seller", condition="Nuevo", editorial="", images=[f"https://img/{n}.jpg"],
+                url=f"https://www.vinted.es/item/{n}",
+            )
+        User.objects.create_user("dashboard", password="dashboard")
+
+    def setUp(self):
+        self.client.login(username="dashboard", password="dashboard")
+
+    def export(self, **params) -> str:
+        response = self.client.get("/api/export/", params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_streams_filtered_rows(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(min_price="11"))))
+        self.assertEqual([row["name"] for row in rows], ["Book 1", "Book 2"])
+        self.assertEqual(rows[0]["image"], "https://img/1.jpg")
+
+    def test_ndjson_has_one_object_per_line(self):
+        rows = [json.loads(line) for line in self.export(format="ndjson").splitlines()]
+        self.assertEqual([row["price"] for row in rows], [10, 11, 12])
+
+    def test_rows_without_images_export_an_empty_image(self):
+        Detail.objects.filter(name="Book 0").update(images=[])
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertEqual([row["image"] for row in rows], ["", "https://img/1.jpg", "https://img/2.jpg"])
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get("/api/export/", {"format": "xml"}).status_code, 400)
+
+
+class GroupResultsPaginationTests(TestCase):
+    """Keyset pages of /api/group_results/ over groups with tied sort values."""
+
+    @classmethod
+    def setUpTestData(cls):
+        source = Source.objects.create(spider_name="vinted_high", spider_domain="www.vinted.es")
+        for isbn in ("9788408000000", "9788408000001"):
+            history = History.objects.create(site_id=source, isbn=isbn)
+            for n, price in enumerate([12, 10, 10, 11, 10]):
+                Detail.objects.create(
+                    history=history, isbn=isbn, site_id=source.spider_id, name=f"Book {n}", price=price,
+                    seller=f"seller{n % 2}", condition="Nuevo", editorial="", images=[],
+                    url=f"https://www.vinted.es/{isbn}/{n}",
+                )
+        User.objects.create_user("dashboard", password="dashboard")
+
+    def setUp(self):
+        self.client.login(username="dashboard", password="dashboard")
+
+    def get(self, **params):
+        return self.client.get("/api/group_results/", params)
+
+    def walk(self, **params) -> list[int]:
+        ids, cursor = [], None
+        while True:
+            response = self.get(**params, **({"cursor": cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page["results"]), int(params["limit"]))
+            ids += [row["detail_id"] for row in page["results"]]
+            if not (cursor := page["next_cursor"]):
+                return ids
+
+    def test_pages_cover_tied_rows_exactly_once(self):
+        for group_by, sort in (("isbn", "price"), ("isbn", "-price"), ("seller", "price"), ("seller", "")):
+            with self.subTest(group_by=group_by, sort=sort):
+                ordering = [group_by, *({"price": ["price", "detail_id"], "-price": ["-price", "-detail_id"]}
+                                        .get(sort, ["detail_id"]))]
+                expected = list(Detail.objects.order_by(*ordering).values_list("detail_id", flat=True))
+                self.assertEqual(self.walk(group_by=group_by, sort=sort, limit=2), expected)
+
+    def test_key_limits_rows_to_one_group(self):
+        ids = self.walk(key="9788408000001", sort="price", limit=3)
+        self.assertEqual(set(ids), set(Detail.objects.filter(isbn="9788408000001").values_list("detail_id", flat=True)))
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.get(limit=0).json()["results"]), 1)
+        self.assertEqual(len(self.get(limit=100000).json()["results"]), 10)
+
+    def test_grouped_results_are_paged_by_group(self):
+        caches[CACHE_ALIAS].clear()
+        pages, cursor = [], None
+        while True:
+            params = {"group_by": "isbn", "condition": "Nuevo", "limit": 1, **({"cursor": cursor} if cursor else {})}
+            page = self.client.get("/api/all_filtered_results/", params).json()
+            pages.append([(group["Isbn"], len(group["results"])) for group in page["results"]])
+            if not (cursor := page["next_cursor"]):
+                break
+        self.assertEqual(pages, [[("9788408000000", 5)], [("9788408000001", 5)]])
+
+    def test_bad_parameters_are_rejected(self):
+        wrong_length = base64.urlsafe_b64encode(b'["9788408000000"]').decode()
+        for params in ({"cursor": "not-a-cursor"}, {"cursor": wrong_length}, {"limit": "ten"},
+                       {"sort": "name"}, {"group_by": "name"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+
+class BulkUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        source = Source.objects.create(spider_name="vinted_high", spider_domain="www.vinted.es")
+        cls.ids = []
+        for isbn in ("9788408000000", "9788408000001"):
+            history = History.objects.create(site_id=source, isbn=isbn)
+            for n in range(3):
+                cls.ids.append(Detail.objects.create(
+                    history=history, isbn=isbn, site_id=source.spider_id, name=f"Book {n}", price=10 + n,
+                    seller="seller", condition="Nuevo", editorial="", images=[], url=f"https://www.vinted.es/{isbn}/{n}",
+                ).detail_id)
+        User.objects.create_user("dashboard", password="dashboard")
+
+    def setUp(self):
+        self.client.login(username="dashboard", password="dashboard")
+
+    def patch(self, body):
+        return self.client.patch("/api/bulk_update/", body, content_type="application/json")
+
+    def test_ids_are_updated_in_one_statement(self):
+        # session, user, SELECT matching ids, UPDATE details, bump cache version
+        with self.assertNumQueries(5):
+            response = self.patch({"ids": [*self.ids[:4], 0], "interest": Detail.INTERESTED})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], 4)
+        self.assertEqual(response.json()["results"][-1], {"detail_id": 0, "status": "not_found"})
+        self.assertEqual(Detail.objects.filter(interest=Detail.INTERESTED).count(), 4)
+
+    def test_filters_select_a_group(self):
+        response = self.patch({"filters": {"isbn": "9788408000001", "min_price": "11"}, "contact": True})
+        self.assertEqual([row["detail_id"] for row in response.json()["results"]], self.ids[4:])
+        self.assertEqual(set(Detail.objects.filter(contact=True).values_list("detail_id", flat=True)), set(self.ids[4:]))
+
+    def test_requires_exactly_one_target(self):
+        self.assertEqual(self.patch({"ids": self.ids, "filters": {}, "contact": True}).status_code, 400)
+        self.assertEqual(self.patch({"ids": self.ids}).status_code, 400)
+
+
+class PriceHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.end = date(2026, 1, 10)
+        PriceObservation.objects.bulk_create([
+            PriceObservation(detail_id=detail_id, isbn="9788408000000", observed_on=cls.end - timedelta(days=day),
+                             price=price)
+            for detail_id, day, price in ((1, 9, 20), (1, 5, 18), (2, 4, 30), (1, 0, 15), (3, 30, 99))
+        ])
+        User.objects.create_user("dashboard", password="dashboard")
+
+    def setUp(self):
+        self.client.login(username="dashboard", password="dashboard")
+
+    def test_series_is_bucketed_over_the_range(self):
+        response = self.client.get("/api/price_history/", {
+            "isbn": "9788408000000", "start": "2026-01-01", "end": "2026-01-10", "points": "2",
+        })
+        self.assertEqual(response.json()["9788408000000"], [
+            {"date": "2026-01-01", "avg_price": 19.0, "min_price": 18, "max_price": 20, "observations": 2},
+            {"date": "2026-01-06", "avg_price": 22.5, "min_price": 15, "max_price": 30, "observations": 2},
+        ])
+
+    def test_isbn_is_required(self):
+        self.assertEqual(self.client.get("/api/price_history/").status_code, 400)
+
+
+class ImportUnrelatedUrlsTests(TestCase):
+    def test_csv_is_imported_once_under_the_domains_first_list(self):
+        vinted = Source.objects.create(spider_name="vinted_high", spider_domain="www.vinted.es")
+        Source.objects.create(spider_name="vinted_low", spider_domain="www.vinted.es")
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8") as csv_file:
+            csv_file.write("Search Term,Url\n9788468358604,https://www.vinted.es/items/1\n")
+            csv_file.write(",https://www.vinted.es/items/2\n")  # no search term: skipped
+            csv_file.flush()
+            call_command("import_unrelated_urls", csv_file.name, stdout=io.StringIO())
+            call_command("import_unrelated_urls", csv_file.name, stdout=io.StringIO())
+
+        self.assertEqual(
+            list(UnrelatedUrl.objects.values_list("site_id", "search_term", "url")),
+            [(vinted.spider_id, "9788468358604", "https://www.vinted.es/items/1")],
+        )
@@ -3,21 +3,31 @@ from django.urls import path
 from .views import (
     market_place_names,
     conditions_of_books,
+    filter_facets,
     main_stats,
     price_range_of_books,
     all_filtered_results,
+    group_results,
+    export_results,
+    price_history,
     dashboard_view,
     update_interest_view,
-    update_contact_view
+    update_contact_view,
+    bulk_update_view,
 )
 
 urlpatterns = [
     path("market_place_names/",   market_place_names,   name="market_place_names"),
     path("price_range_of_books/", price_range_of_books, name="price_range_of_books"),
     path("conditions_of_books/",  conditions_of_books,  name="conditions_of_books"),
+    path("filter_facets/",        filter_facets,        name="filter_facets"),
     path("main_stats/",           main_stats,           name="main_stats"),
     path("all_filtered_results/", all_filtered_results, name="all_filtered_results"),
+    path("group_results/",        group_results,        name="group_results"),
+    path("export/",               export_results,       name="export_results"),
+    path("price_history/",        price_history,        name="price_history"),
     path("dashboard/",            dashboard_view,       name="dashboard_view"),
     path("interest/<int:detail_id>/", update_interest_view, name="update_interest"),
     path("contact/<int:detail_id>/", update_contact_view, name="update_contact"),
+    path("bulk_update/", bulk_update_view, name="bulk_update"),
 ]
\ No newline at end of file
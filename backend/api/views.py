@@ -1,16 +1,31 @@
 from collections import defaultdict
+from datetime import date, timedelta
 
-from django.db.models import Avg, Min, Max, Count
+from django.db import DatabaseError
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q, Sum
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from .exports import EXPORT_FORMATS, EXPORT_WRITERS, export_rows
 from .models import Source, Detail
-from .serializers import DetailSerializer, InterestUpdateSerializer
-from .services import get_details, update_interest
+from .pagination import keyset_paginate, get_page_size, get_ordering
+from .response_cache import cached_response, bump_cache_version
+from .serializers import InterestUpdateSerializer, BulkUpdateSerializer, serialize_detail_rows
+from .services import (
+    get_details, get_archived_details, summary_queryset, format_group_summary, update_interest,
+    bulk_update_details, detail_values, get_filter_facets, group_marketplaces, get_price_series,
+)
+
+GROUP_BY_FIELDS = ("seller", "isbn")
+PRICE_SERIES_MAX_ISBNS  = 50
+PRICE_SERIES_MAX_POINTS = 365
 
 
 # ─────────────────────────────────────────────────────────────
@@ -69,6 +84,7 @@ def dashboard_view(request):
 
 
 @api_view(["GET"])
+@cached_response
 def market_place_names(request):
     """
     Returns a dict grouping spider names by their base marketplace name.
@@ -78,32 +94,26 @@ def market_place_names(request):
     if guard:
         return guard
 
-    groups = defaultdict(list)
-    for name in Source.objects.all().values_list("spider_name", flat=True):
-        base = next(iter(name.split("_")))
-        groups[base].append(name.replace(base + "_", ""))
-
-    return Response(groups)
+    return Response(group_marketplaces(Source.objects.all().values_list("spider_name", flat=True)))
 
 
 @api_view(["GET"])
+@cached_response
 def price_range_of_books(request):
     """
-    Returns {min_price, max_price} across the current filter set.
-    Accepts all filters supported by get_details().
+    Returns {min_price, max_price} across the current filter set (nulls when
+    nothing matches). Accepts all filters supported by get_details().
     """
     guard = require_login(request)
     if guard:
         return guard
 
     detail, _ = get_details(request=request)
-    return Response({
-        "min_price": detail.order_by("price").first().price,
-        "max_price": detail.order_by("-price").first().price,
-    })
+    return Response(detail.aggregate(min_price=Min("price"), max_price=Max("price")))
 
 
 @api_view(["GET"])
+@cached_response
 def conditions_of_books(request):
     """
     Returns a sorted list of distinct condition strings (+ 'All') across
@@ -121,11 +131,38 @@ def conditions_of_books(request):
 
 
 @api_view(["GET"])
+@cached_response
+def filter_facets(request):
+    """
+    Filter-control data for the current filter set in one response, computed
+    by a single grouped query (see services.facet_counts):
+        { "total", "min_price", "max_price", "conditions": [..., "All"],
+          "condition_counts": {condition: n}, "domain_counts": {spider_name: n},
+          "interest_counts": {interest: n}, "contact_counts": {"true"|"false"|"null": n},
+          "price_histogram": [{"from", "to" (null for the last), "count"}],
+          "marketplaces": <market_place_names() shape, unfiltered> }
+    Accepts all filters supported by get_details().
+    """
+    guard = require_login(request)
+    if guard:
+        return guard
+
+    try:
+        detail, _ = get_details(request=request)
+    except ValueError:
+        return Response({"error": "Invalid filter value."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(get_filter_facets(detail))
+
+
+@api_view(["GET"])
+@cached_response
 def main_stats(request):
     """
     Returns aggregate stats for the current filter set:
         Total Books, Unique Sellers, Average Price,
         Rotation Rate, Hot Books, Sold Books
+    Archived sold listings (get_archived_details()) count as sold books.
+    400 for an invalid filter value, 503 when the database query fails.
     """
     guard = require_login(request)
     if guard:
@@ -133,24 +170,52 @@ def main_stats(request):
 
     try:
         detail, _ = get_details(request=request)
-        total = detail.count()
+        stats = detail.aggregate(
+            total=Count("detail_id"),
+            sellers=Count("seller", distinct=True),
+            price_sum=Sum("price"),
+            hot=Count("detail_id", filter=Q(availability=True)),
+            sold=Count("detail_id", filter=Q(availability=False)),
+        )
+        # Archived rows are sold rows too (as in summary_table); sellers only count once
+        archived = get_archived_details(request).aggregate(
+            total=Count("detail_id"),
+            sellers=Count("seller", distinct=True, filter=~Exists(detail.filter(seller=OuterRef("seller")))),
+            price_sum=Sum("price"),
+        )
+        total = stats["total"] + archived["total"]
+        sold = stats["sold"] + archived["total"]
+        price_sum = (stats["price_sum"] or 0) + (archived["price_sum"] or 0)
         return Response({
             "Total Books":    total,
-            "Unique Sellers": detail.values_list("seller", flat=True).distinct().count(),
-            "Average Price":  round((detail.aggregate(avg_price=Avg("price")).get("avg_price") or 0), 2),
-            "Rotation Rate":  f"{round((detail.filter(availability=False).count() / (total or 1)) * 100, 2)} %",
-            "Hot Books":      detail.filter(availability=True).count(),
-            "Sold Books":     detail.filter(availability=False).count(),
-        })
-    except Exception:
-        return Response({
-            "Total Books": 0, "Unique Sellers": 0, "Average Price": 0,
-            "Rotation Rate": "0 %", "Hot Books": 0, "Sold Books": 0,
+            "Unique Sellers": stats["sellers"] + archived["sellers"],
+            "Average Price":  round(price_sum / (total or 1), 2),
+            "Rotation Rate":  f"{round((sold / (total or 1)) * 100, 2)} %",
+            "Hot Books":      stats["hot"],
+            "Sold Books":     sold,
         })
+    except ValueError:
+        return Response({"error": "Invalid filter value."}, status=status.HTTP_400_BAD_REQUEST)
+    except DatabaseError:
+        # Never a 200: cached_response would keep all-zero stats until the next version bump
+        return Response({"error": "Stats are temporarily unavailable."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
 
 @api_view(["GET"])
+@cached_response
 def all_filtered_results(request):
+    """
+    Results grouped by 'isbn' (default) or 'seller'.
+
+    Default            → a keyset page of groups (on the group key), each with
+                         its available rows.
+    ?summary=true      → per-group stats only, same paging; the rows of a
+                         group come from /api/group_results/.
+    Group stats come from summary_table unless a row-level filter is active
+    (see has_row_filters()); they then reflect each site's last crawl.
+    ?group_by=none     → flat rows, keyset-paginated by ?sort= (see SORT_ORDERINGS).
+    Paginated responses: { "results": [...], "next_cursor": "<cursor>" | null }.
+    """
     guard = require_login(request)
     if guard:
         return guard
@@ -158,49 +223,168 @@ def all_filtered_results(request):
     group_by = request.GET.get("group_by", "isbn")
     detail, _ = get_details(request=request)
     available_detail = detail.filter(availability=True)
+    cursor = request.GET.get("cursor")
+
+    if group_by in GROUP_BY_FIELDS and request.GET.get("summary", "").lower() in ("1", "true"):
+        try:
+            rows, next_cursor = keyset_paginate(
+                summary_queryset(request, detail, group_by), ordering=[group_by], cursor=cursor,
+                limit=get_page_size(request),
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "results": [format_group_summary(group_by, row[group_by], row) for row in rows],
+            "next_cursor": next_cursor,
+        })
+
+    if group_by in GROUP_BY_FIELDS:
+        # A page of groups (keyset on the group key), then the available rows of those groups only
+        try:
+            groups, next_cursor = keyset_paginate(
+                summary_queryset(request, detail, group_by), ordering=[group_by], cursor=cursor,
+                limit=get_page_size(request),
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        keys = [row[group_by] for row in groups]
+        in_page = Q(**{f"{group_by}__in": [key for key in keys if key]})
+        if any(not key for key in keys):
+            in_page |= Q(**{f"{group_by}__isnull": True}) | Q(**{group_by: ""})
 
-    if group_by in ("seller", "isbn"):
-        # Pre‑compute aggregates for available books
-        available_agg = available_detail.values(group_by).annotate(
-            avg_price=Avg("price"),
-            min_price=Min("price"),
-            max_price=Max("price"),
-            available_count=Count("detail_id")
+        grouped_data = defaultdict(list)
+        for row in detail_values(available_detail.filter(in_page)):
+            grouped_data[row[group_by] or ""].append(row)
+
+        return Response({
+            "results": [
+                {
+                    **format_group_summary(group_by, row[group_by] or "unknown", row),
+                    "results": serialize_detail_rows(grouped_data[row[group_by] or ""]),
+                }
+                for row in groups
+            ],
+            "next_cursor": next_cursor,
+        })
+
+    try:
+        rows, next_cursor = keyset_paginate(
+            detail_values(detail), ordering=get_ordering(request), cursor=cursor, limit=get_page_size(request)
         )
-        agg_dict = {item[group_by]: item for item in available_agg}
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({"results": serialize_detail_rows(rows), "next_cursor": next_cursor})
 
-        # Pre‑compute sold counts per group
-        sold_agg = detail.filter(availability=False).values(group_by).annotate(
-            sold_count=Count("detail_id")
+
+@api_view(["GET"])
+def group_results(request):
+    """
+    GET /api/group_results/?group_by=isbn&key=<value>&sort=price&cursor=<cursor>&limit=50
+
+    Available rows of one group (or of every group when `key` is omitted),
+    keyset-paginated on (group key, sort field, detail_id). Without ?sort= rows
+    are in detail_id order. Accepts all get_details() filters.
+
+    Returns:
+        200  { "results": [...], "next_cursor": "<cursor>" | null }
+        400  invalid group_by / sort / cursor / limit
+    """
+    guard = require_login(request)
+    if guard:
+        return guard
+
+    group_by = request.GET.get("group_by", "isbn")
+    if group_by not in GROUP_BY_FIELDS:
+        return Response({"error": "group_by must be 'isbn' or 'seller'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    detail, _ = get_details(request=request)
+    detail = detail.filter(availability=True)
+    if (key := request.GET.get("key")) is not None:
+        detail = detail.filter(**{group_by: key})
+
+    try:
+        ordering = [group_by, *(get_ordering(request) if request.GET.get("sort") else ["detail_id"])]
+        rows, next_cursor = keyset_paginate(
+            detail_values(detail), ordering=ordering, cursor=request.GET.get("cursor"), limit=get_page_size(request)
         )
-        sold_dict = {item[group_by]: item["sold_count"] for item in sold_agg}
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Group items
-        grouped_data = defaultdict(list)
-        for obj in available_detail:
-            key = getattr(obj, group_by) or "unknown"
-            grouped_data[key].append(obj)
-
-        response = []
-        for key, items in grouped_data.items():
-            agg = agg_dict.get(key, {})
-            total_available = agg.get("available_count", len(items))
-            sold_count = sold_dict.get(key, 0)
-
-            response.append({
-                group_by.capitalize(): key,
-                "Available Books": total_available,
-                "Books Sold": sold_count,
-                "Average Rotation (%)": f"{round((sold_count / (total_available or 1)) * 100, 2)}%",
-                "Average Price": round(agg.get("avg_price") or 0, 2),
-                "Minimum Price": round(agg.get("min_price") or 0, 2),
-                "Maximum Price": round(agg.get("max_price") or 0, 2),
-                "results": DetailSerializer(items, many=True).data,
-            })
-
-        return Response(response)
-
-    return Response(DetailSerializer(detail, many=True).data)
+    return Response({"results": serialize_detail_rows(rows), "next_cursor": next_cursor})
+
+@require_GET
+def export_results(request):
+    """
+    GET /api/export/?format=csv|ndjson&<get_details() filters>
+
+    Streams every filtered row (available and sold) in detail_id order. Plain
+    Django view: DRF's Response can't stream and @api_view would take ?format=
+    for content negotiation.
+
+    Returns:
+        200  streamed attachment, one row per line (csv has a header row)
+        400  unknown format / invalid filter value
+    """
+    guard = require_login(request)
+    if guard:
+        return guard
+
+    export_format = request.GET.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse(
+            {"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        detail, _ = get_details(request=request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid filter value."}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(
+        EXPORT_WRITERS[export_format](export_rows(detail)), content_type=EXPORT_FORMATS[export_format]
+    )
+    filename = f"books_{timezone.now():%Y%m%d_%H%M%S}.{export_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+@api_view(["GET"])
+@cached_response
+def price_history(request):
+    """
+    GET /api/price_history/?isbn=<isbn>[,<isbn>...]&start=YYYY-MM-DD&end=YYYY-MM-DD&points=60
+
+    Downsampled price series per ISBN (see services.get_price_series). The
+    range defaults to the last 90 days; at most 50 ISBNs and 365 points.
+
+    Returns:
+        200  { "<isbn>": [{ "date", "avg_price", "min_price", "max_price", "observations" }, ...] }
+        400  missing isbn / invalid dates or points
+    """
+    guard = require_login(request)
+    if guard:
+        return guard
+
+    isbns = list(dict.fromkeys(isbn for isbn in request.GET.get("isbn", "").split(",") if isbn))
+    if not isbns or len(isbns) > PRICE_SERIES_MAX_ISBNS:
+        return Response(
+            {"error": f"isbn must list 1 to {PRICE_SERIES_MAX_ISBNS} ISBNs."}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        end = date.fromisoformat(request.GET["end"]) if request.GET.get("end") else timezone.now().date()
+        start = date.fromisoformat(request.GET["start"]) if request.GET.get("start") else end - timedelta(days=89)
+        points = int(request.GET.get("points", 60))
+    except ValueError:
+        return Response({"error": "start/end must be YYYY-MM-DD and points an integer."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if start > end or not 1 <= points <= PRICE_SERIES_MAX_POINTS:
+        return Response({"error": f"start must not be after end; points must be 1-{PRICE_SERIES_MAX_POINTS}."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(get_price_series(isbns, start, end, points))
 
 # @api_view(["GET"])
 # def all_filtered_results(request):
@@ -296,6 +480,7 @@ def update_interest_view(request, detail_id: int):
     except Detail.DoesNotExist:
         return Response({"error": "Detail not found."}, status=status.HTTP_404_NOT_FOUND)
 
+    bump_cache_version()
     return Response(
         {"detail_id": detail.detail_id, "interest": detail.interest},
         status=status.HTTP_200_OK,
@@ -322,6 +507,7 @@ def update_contact_view(request, detail_id: int):
         detail = Detail.objects.get(pk=detail_id)
         detail.contact = contact_value
         detail.save(update_fields=["contact"])
+        bump_cache_version()
         return Response(
             {"detail_id": detail.detail_id, "contact": detail.contact},
             status=status.HTTP_200_OK
@@ -330,4 +516,61 @@ def update_contact_view(request, detail_id: int):
         return Response(
             {"error": "Detail not found."},
             status=status.HTTP_404_NOT_FOUND
-        )
\ No newline at end of file
+        )
+
+
+@api_view(["PATCH"])
+def bulk_update_view(request):
+    """
+    PATCH /api/bulk_update/
+
+    Body (JSON):
+        { "ids": [1, 2, 3], "interest": "interested" }
+        { "filters": { "isbn": "9788408000000", "domains": "vinted_high" }, "contact": true }
+
+    Applies the values with a single UPDATE (at most 1000 rows per call).
+
+    Returns:
+        200  { "updated": <int>, "results": [{ "detail_id": <int>, "status": "updated" | "not_found", ...values }] }
+        400  validation errors / too many matching rows
+    """
+    guard = require_login(request)
+    if guard:
+        return guard
+
+    serializer = BulkUpdateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    values = {field: data[field] for field in ("interest", "contact") if field in data}
+
+    if "ids" in data:
+        requested = list(dict.fromkeys(data["ids"]))
+        detail = Detail.objects.filter(detail_id__in=requested)
+    else:
+        filters = data["filters"]
+        try:
+            detail, _ = get_details(request=request, params=filters)
+        except ValueError:
+            return Response({"error": "Invalid filter value."}, status=status.HTTP_400_BAD_REQUEST)
+        for field in GROUP_BY_FIELDS:
+            if field in filters:
+                detail = detail.filter(**{field: filters[field]})
+        requested = None
+
+    try:
+        updated = bulk_update_details(detail, values, limit=BulkUpdateSerializer.MAX_ROWS)
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if updated:
+        bump_cache_version()
+
+    updated_ids = set(updated)
+    results = [
+        {"detail_id": detail_id, "status": "updated", **values} if detail_id in updated_ids
+        else {"detail_id": detail_id, "status": "not_found"}
+        for detail_id in (updated if requested is None else requested)
+    ]
+    return Response({"updated": len(updated), "results": results}, status=status.HTTP_200_OK)
@@ -140,6 +140,30 @@ if DATABASE_URL:
 #         }
 #     }
 
+# Caches
+# "responses" holds the dashboard API responses (api/response_cache.py); entries are
+# versioned and dropped whenever a spider finishes, so the timeout is only a safety net.
+# RESPONSE_CACHE_BACKEND=file shares them between gunicorn workers without extra services.
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "locmem")
+RESPONSE_CACHE_DIR     = os.environ.get("RESPONSE_CACHE_DIR", BASE_DIR / "cache" / "responses")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": RESPONSE_CACHE_DIR,
+        "TIMEOUT": 3600,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    } if RESPONSE_CACHE_BACKEND == "file" else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+        "TIMEOUT": 3600,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
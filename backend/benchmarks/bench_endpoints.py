@@ -0,0 +1,164 @@
+"""
+Time the dashboard endpoints on a large synthetic details_table, before and
+after the access-path indexes declared in api.models.Detail.Meta.indexes.
+
+Builds a throw-away SQLite database (or uses DATABASE_URL with --use-env —
+careful, rows are inserted into it and its indexes dropped/recreated),
+migrates it, drops those indexes, seeds N rows, times every endpoint,
+recreates the indexes and times them again.
+
+Usage (from backend/):
+    python -m benchmarks.bench_endpoints --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+ENDPOINTS = [
+    "/api/market_place_names/",
+    "/api/main_stats/",
+    "/api/main_stats/?domains=wallapop_high&days_old=7",
+    "/api/price_range_of_books/",
+    "/api/conditions_of_books/",
+    "/api/filter_facets/",
+    "/api/all_filtered_results/?summary=true",
+    "/api/all_filtered_results/?group_by=none&sort=price",
+    "/api/all_filtered_results/?group_by=none&sort=-first_seen&days_old=7",
+    "/api/all_filtered_results/?group_by=isbn&interest=interested&domains=vinted_high",
+    "/api/group_results/?group_by=isbn&key=9788400000042",
+]
+
+CONDITIONS = ["Nuevo", "Como nuevo", "En buen estado", "Aceptable", "Usado"]
+
+
+def setup_django(use_env: bool):
+    if not use_env:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')}"
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    settings.DEBUG = False  # don't keep every query in memory
+
+
+def seed(rows: int, isbns: int):
+    from django.db import connection, transaction
+    from api.models import Source, History
+
+    sources = [
+        Source.objects.create(spider_name="wallapop_high", spider_domain="es.wallapop.com"),
+        Source.objects.create(spider_name="vinted_high", spider_domain="www.vinted.es"),
+    ]
+    histories = History.objects.bulk_create(
+        [History(site_id=source, isbn=f"97884{n:08d}") for source in sources for n in range(isbns)]
+    )
+
+    today = date.today()
+    sql = (
+        "INSERT INTO details_table (history_id, isbn, date_scraped, first_seen, site_id, name, price, seller, "
+        "condition, editorial, images, url, availability, interest, contact) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+    )
+    chunk = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for n in range(rows):
+            history = histories[n % len(histories)]
+            chunk.append((
+                history.history_id, history.isbn, today - timedelta(days=random.randint(0, 40)),
+                today - timedelta(days=random.randint(0, 90)), history.site_id_id, f"Book {n}",
+                round(random.uniform(1, 60), 2), f"seller{random.randint(0, rows // 20)}",
+                random.choice(CONDITIONS), "", '["https://img.local/%d.jpg"]' % n, f"https://bench.local/{n}",
+                random.random() > 0.25, "interested" if random.random() < 0.01 else "pending", False,
+            ))
+            if len(chunk) == 50_000:
+                cursor.executemany(sql, chunk)
+                chunk.clear()
+        if chunk:
+            cursor.executemany(sql, chunk)
+
+    # summary_table, as the scraper leaves it after each spider closes
+    from books_scraper.spiders.database import DatabaseManager
+    db = DatabaseManager()
+    for source in sources:
+        db.refresh_summaries(source.spider_id)
+
+
+def set_indexes(enabled: bool):
+    from django.db import connection
+    from api.models import Detail
+
+    with connection.schema_editor() as editor:
+        for index in Detail._meta.indexes:
+            (editor.add_index if enabled else editor.remove_index)(Detail, index)
+
+
+def analyze():
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def time_endpoints(client, repeat: int) -> dict:
+    from django.core.cache import caches
+
+    timings = {}
+    for url in ENDPOINTS:
+        best = float("inf")
+        for _ in range(repeat):
+            caches["responses"].clear()  # time the uncached path
+            start = time.perf_counter()
+            response = client.get(url)
+            best = min(best, time.perf_counter() - start)
+            assert response.status_code == 200, (url, response.status_code)
+        timings[url] = best
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--isbns", type=int, default=5_000, help="ISBNs per source")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per endpoint")
+    parser.add_argument("--use-env", action="store_true", help="run against DATABASE_URL instead of a temp SQLite file")
+    args = parser.parse_args()
+
+    setup_django(args.use_env)
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+
+    call_command("migrate", verbosity=0)
+    set_indexes(False)
+
+    start = time.perf_counter()
+    seed(args.rows, args.isbns)
+    analyze()
+    print(f"{connection.vendor}: seeded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+    User.objects.create_user("bench", password="bench")
+    client = Client()
+    client.login(username="bench", password="bench")
+
+    before = time_endpoints(client, args.repeat)
+    set_indexes(True)
+    analyze()
+    after = time_endpoints(client, args.repeat)
+
+    print(f"{'endpoint':<80} {'before':>9} {'after':>9}")
+    for url in ENDPOINTS:
+        print(f"{url:<80} {before[url]:8.3f}s {after[url]:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark DatabaseManager.update_history_counts against the old per-history loop.
+
+Seeds a throw-away SQLite database (or DATABASE_URL when --use-env is given)
+with one site, N ISBNs and a few details per ISBN, then times both versions.
+
+Usage (from backend/):
+    python -m benchmarks.bench_history_counts --isbns 10000 --details 5
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import select, update, func
+
+
+def legacy_update_history_counts(db, site_id: int):
+    """The 3×N statement loop update_history_counts used to run."""
+    from books_scraper.spiders.models import History, Detail
+
+    with db.session_scope() as session:
+        history_ids = (
+            session.execute(select(History.history_id).where(History.site_id == site_id))
+            .scalars()
+            .all()
+        )
+        for history_id in history_ids:
+            available_count = (
+                session.query(func.count(Detail.detail_id))
+                .filter(Detail.history_id == history_id, Detail.availability.is_(True))
+                .scalar()
+            )
+            sold_count = (
+                session.query(func.count(Detail.detail_id))
+                .filter(Detail.history_id == history_id, Detail.availability.is_(False))
+                .scalar()
+            )
+            session.execute(
+                update(History)
+                .where(History.history_id == history_id)
+                .values(available_books=available_count, sold_books=sold_count)
+            )
+
+
+def seed(db, isbns: int, details: int) -> int:
+    from books_scraper.spiders.models import History, Detail
+
+    site_id = db.save_spider_info(spider_name="bench_high", spider_domain="bench.local")
+    with db.session_scope() as session:
+        session.execute(History.__table__.insert(), [{"site_id": site_id, "isbn": f"{i:013d}"} for i in range(isbns)])
+        history_ids = session.execute(select(History.history_id, History.isbn)).all()
+
+        rows = [
+            {
+                "history_id": history_id, "isbn": isbn, "site_id": site_id, "price": random.uniform(1, 50),
+                "url": f"https://bench.local/{history_id}/{n}", "availability": random.random() > 0.3,
+                "date_scraped": date.today(), "first_seen": date.today(), "interest": "pending",
+            }
+            for history_id, isbn in history_ids
+            for n in range(details)
+        ]
+        session.execute(Detail.__table__.insert(), rows)
+    return site_id
+
+
+def timed(label: str, fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed:8.3f}s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--isbns", type=int, default=10_000)
+    parser.add_argument("--details", type=int, default=5, help="details per ISBN")
+    parser.add_argument("--use-env", action="store_true", help="run against DATABASE_URL instead of a temp SQLite file")
+    args = parser.parse_args()
+
+    if not args.use_env:
+        tmp_dir = tempfile.mkdtemp()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.sqlite3')}"
+
+    from books_scraper.spiders.database import DatabaseManager
+    from books_scraper.spiders.models import Base
+
+    db = DatabaseManager()
+    Base.metadata.create_all(db.engine)
+    site_id = seed(db, args.isbns, args.details)
+    print(f"{db.engine.dialect.name}: {args.isbns} ISBNs × {args.details} details")
+
+    before = timed("before", legacy_update_history_counts, db, site_id)
+    after = timed("after", db.update_history_counts, site_id)
+    print(f"speed-up   {before / after:8.1f}×")
+
+
+if __name__ == "__main__":
+    main()
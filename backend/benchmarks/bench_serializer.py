@@ -0,0 +1,53 @@
+"""
+Rows/sec of DetailSerializer over model instances vs serialize_detail_rows()
+over detail_values() dicts, including the query and row construction.
+
+Seeds a throw-away SQLite database (see bench_endpoints) unless --use-env.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serializer --rows 100000
+"""
+import argparse
+import time
+
+from benchmarks.bench_endpoints import setup_django, seed
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    parser.add_argument("--use-env", action="store_true", help="run against DATABASE_URL instead of a temp SQLite file")
+    args = parser.parse_args()
+
+    setup_django(args.use_env)
+    from django.core.management import call_command
+    from django.db import connection
+    from api.models import Detail
+    from api.serializers import DetailSerializer, serialize_detail_rows
+    from api.services import detail_values
+
+    call_command("migrate", verbosity=0)
+    seed(args.rows, isbns=max(1, args.rows // 200))
+    queryset = Detail.objects.order_by("detail_id")
+
+    before = timed(lambda: DetailSerializer(queryset.all(), many=True).data, args.repeat)
+    after = timed(lambda: serialize_detail_rows(detail_values(queryset.all())), args.repeat)
+
+    print(f"{connection.vendor}: {args.rows} rows, best of {args.repeat}")
+    print(f"{'DetailSerializer':<24} {args.rows / before:12,.0f} rows/s")
+    print(f"{'serialize_detail_rows':<24} {args.rows / after:12,.0f} rows/s")
+    print(f"{'speed-up':<24} {before / after:12.1f}×")
+
+
+if __name__ == "__main__":
+    main()
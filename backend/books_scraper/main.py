@@ -1,5 +1,11 @@
+import os
+import json
+import time
+import argparse
+import multiprocessing
 from os import listdir
-from collections import deque
+from collections import deque, defaultdict, Counter
+from urllib.parse import urlparse
 
 from scrapy import signals
 from scrapy.crawler import CrawlerProcess
@@ -20,6 +26,8 @@ class SequentialRunner:
     def __init__(self):
         self.process = CrawlerProcess(get_project_settings())
         self.queue = deque()
+        # list name -> crawls of that list that closed with reason "finished"
+        self.finished = Counter()
 
     def add_job(self, spider_cls, **kwargs):
         self.queue.append((spider_cls, kwargs))
@@ -40,8 +48,15 @@ class SequentialRunner:
 
         self.process.crawl(crawler, **kwargs)
 
+    def record_close(self, spider, reason):
+        if reason == 'finished':
+            self.finished[spider.list_name] += 1
+            print(f'✅ Finished {spider.name}')
+        else:
+            print(f'❌ {spider.name} closed: {reason}')
+
     def spider_closed(self, spider, reason):
-        print(f'✅ Finished {spider.name}')
+        self.record_close(spider, reason)
         self._crawl_next()
 
     def start(self):
@@ -49,22 +64,173 @@ class SequentialRunner:
         self.process.start()
 
 
-def main():
+def list_tier(list_name: str, settings) -> dict:
+    tiers = settings.getdict('SEARCH_LIST_PRIORITIES')
+    return tiers.get(list_name) or tiers.get('low') or {'interval': 0, 'priority': 0}
+
+
+def load_schedule_state(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_schedule_state(path: str, state: dict) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+
+
+def due_lists(list_names: list[str], settings, state: dict, now: float) -> list[str]:
+    """Lists whose refresh interval has elapsed, highest priority first."""
+    due = [name for name in list_names if now - state.get(name, 0) >= list_tier(name, settings)['interval']]
+    return sorted(due, key=lambda name: list_tier(name, settings)['priority'], reverse=True)
+
+
+def spider_domain(spider_cls) -> str:
+    return urlparse(spider_cls.start_url).netloc
+
+
+class ConcurrentRunner(SequentialRunner):
+    """
+    Runs up to `concurrency` crawlers at once in the same CrawlerProcess.
+    At most `per_domain` crawlers of one domain are active at a time; each has
+    its own downloader and delay/autothrottle settings, so a site sees up to
+    `per_domain` times the request rate of a single crawler.
+    """
+    def __init__(self, concurrency: int = 2, per_domain: int = 1):
+        super().__init__()
+        self.concurrency = concurrency
+        self.per_domain = max(1, per_domain)
+        self.active_domains = Counter()
+
+    def _crawl_next(self):
+        if not self.queue and not self.active_domains:
+            print('🎉 All spiders finished')
+            self.process.stop()
+            return
+
+        for job in list(self.queue):
+            if sum(self.active_domains.values()) >= self.concurrency:
+                break
+
+            spider_cls, kwargs = job
+            domain = spider_domain(spider_cls)
+            if self.active_domains[domain] >= self.per_domain:
+                continue
+
+            self.queue.remove(job)
+            self.active_domains[domain] += 1
+            print(f'🚀 Starting {spider_cls.name} with {kwargs}')
+
+            crawler = self.process.create_crawler(spider_cls)
+            crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+            self.process.crawl(crawler, **kwargs)
+
+    def spider_closed(self, spider, reason):
+        self.record_close(spider, reason)
+        self.active_domains[spider.spider_domain] -= 1
+        if self.active_domains[spider.spider_domain] <= 0:
+            del self.active_domains[spider.spider_domain]
+        self._crawl_next()
+
+
+def run_jobs(jobs: list) -> Counter:
+    """Worker-process entry point: crawl `jobs` one after another, return the runner's finished counts."""
     runner = SequentialRunner()
+    for spider_cls, kwargs in jobs:
+        runner.add_job(spider_cls, **kwargs)
+    runner.start()
+    return runner.finished
+
+
+def run_in_processes(jobs: list, workers: int = 2, per_domain: int = 1) -> Counter:
+    """
+    Fan jobs out over worker processes. Each domain's jobs are split into at
+    most `per_domain` sequential batches, so no more than `per_domain`
+    processes crawl one site at a time.
+    """
+    batches = defaultdict(list)
+    slots = Counter()
+    for spider_cls, kwargs in jobs:
+        domain = spider_domain(spider_cls)
+        batches[(domain, slots[domain] % max(1, per_domain))].append((spider_cls, kwargs))
+        slots[domain] += 1
+
+    # Each worker starts its own Twisted reactor, so never fork one from this process
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes=min(workers, len(batches)) or 1) as pool:
+        finished = sum(pool.map(run_jobs, batches.values()), Counter())
+    print('🎉 All worker processes finished')
+    return finished
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run the book spiders over every search list.')
+    parser.add_argument('--mode', choices=['sequential', 'concurrent', 'processes'], default='sequential')
+    parser.add_argument('--concurrency', type=int, default=2,
+                        help='crawlers running at once in concurrent mode')
+    parser.add_argument('--workers', type=int, default=2, help='worker processes in processes mode')
+    parser.add_argument('--per-domain', type=int, default=1,
+                        help='crawlers (concurrent mode) or processes (processes mode) allowed on one domain at '
+                             'once; with the default of 1 and only one spider enabled, both modes run sequentially')
+    parser.add_argument('--schedule', action='store_true',
+                        help='only crawl lists whose SEARCH_LIST_PRIORITIES interval has elapsed '
+                             '(meant to be run from cron, e.g. every 15 minutes)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='stop paginating at already-seen listings; a full sweep still runs every '
+                             'FULL_SWEEP_INTERVAL seconds to detect removed listings')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    settings = get_project_settings()
 
     spiders = [WallapopSpider]  #[VintedSpider ,WallapopSpider]
 
-    for file_name in listdir('search_lists'):
-        if not file_name.endswith('.txt'):
-            continue
+    list_names = [file_name.split('.')[0] for file_name in listdir('search_lists') if file_name.endswith('.txt')]
+    now = time.time()
+    state_file = settings.get('SEARCH_LIST_STATE_FILE')
+    state = load_schedule_state(state_file)
+    list_names = due_lists(list_names, settings, state if args.schedule else {}, now)
+    full_sweeps = state.setdefault('full_sweep', {})
 
-        list_name = file_name.split('.')[0]
-        search_terms = read_txt_file(file_name)
+    jobs = []
+    full_sweep_lists = set()
+    for list_name in list_names:
+        search_terms = read_txt_file(f'{list_name}.txt')
 
-        for spider_cls in spiders:
-            runner.add_job(spider_cls, list_name=list_name, search_terms=search_terms)
+        incremental = args.incremental and now - full_sweeps.get(list_name, 0) < settings.getint('FULL_SWEEP_INTERVAL')
+        if not incremental:
+            full_sweep_lists.add(list_name)
 
-    runner.start()
+        for spider_cls in spiders:
+            jobs.append((spider_cls, dict(list_name=list_name, search_terms=search_terms, incremental=incremental)))
+
+    if not jobs:
+        print('⏸ No search list is due')
+        return
+
+    if args.mode == 'processes':
+        finished = run_in_processes(jobs, workers=args.workers, per_domain=args.per_domain)
+    else:
+        if args.mode == 'concurrent':
+            runner = ConcurrentRunner(concurrency=args.concurrency, per_domain=args.per_domain)
+        else:
+            runner = SequentialRunner()
+        for spider_cls, kwargs in jobs:
+            runner.add_job(spider_cls, **kwargs)
+        runner.start()
+        finished = runner.finished
+
+    # Only lists whose every crawl finished count as refreshed; the rest stay due for the next run
+    completed = [list_name for list_name in list_names if finished[list_name] == len(spiders)]
+    state.update({list_name: now for list_name in completed})
+    full_sweeps.update({list_name: now for list_name in completed if list_name in full_sweep_lists})
+    save_schedule_state(state_file, state)
 
 
 if __name__ == "__main__":
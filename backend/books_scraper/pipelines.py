@@ -1,8 +1,45 @@
+import time
+from collections import OrderedDict
+
+from twisted.internet import task
+
 
 class SQLitePipeline:
-    def __init__(self):
+    """
+    Write-behind pipeline: items are buffered (one row per url) and written to
+    details_table with a single bulk upsert every `batch_size` items or every
+    `flush_interval` seconds, whichever comes first.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 30, unrelated_ttl_days: int = 90,
+                 archive_after_days: int = 30, archive_batch_size: int = 1000):
         super().__init__()
         self.seen_items = set()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.unrelated_ttl_days = unrelated_ttl_days
+        self.archive_after_days = archive_after_days
+        self.archive_batch_size = archive_batch_size
+
+        self.pending_rows = OrderedDict()
+        self.history_ids = {}
+        self.last_flush = time.monotonic()
+        self.flush_loop = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            batch_size=crawler.settings.getint("PIPELINE_BATCH_SIZE", 100),
+            flush_interval=crawler.settings.getfloat("PIPELINE_FLUSH_INTERVAL", 30),
+            unrelated_ttl_days=crawler.settings.getint("UNRELATED_URL_TTL_DAYS", 90),
+            archive_after_days=crawler.settings.getint("SOLD_ARCHIVE_AFTER_DAYS", 30),
+            archive_batch_size=crawler.settings.getint("ARCHIVE_BATCH_SIZE", 1000),
+        )
+
+    def open_spider(self, spider):
+        if self.flush_interval > 0:
+            self.flush_loop = task.LoopingCall(self.flush_if_due, spider)
+            self.flush_loop.start(self.flush_interval, now=False)
 
     def process_item(self, item, spider):
         site_id = spider.site_id
@@ -13,19 +50,48 @@ class SQLitePipeline:
         if key not in self.seen_items:
             self.seen_items.add(key)
 
-        history_id = spider.db.save_history_entry(site_id=spider.site_id, isbn=isbn)
-        updated_row_id = spider.db.update_detail_entry(url=url, price=item.get("Price"), availability=True)
+        if isbn not in self.history_ids:
+            self.history_ids[isbn] = spider.db.save_history_entry(site_id=site_id, isbn=isbn)
 
-        if not updated_row_id:
-            spider.db.save_detail_entry(item=item, history_id=history_id, site_id=spider.site_id)
+        self.pending_rows[url] = spider.db.build_detail_row(
+            item=item, history_id=self.history_ids[isbn], site_id=site_id
+        )
+        if len(self.pending_rows) >= self.batch_size:
+            self.flush(spider)
 
         return item
 
+    def flush_if_due(self, spider):
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            # An exception would stop the LoopingCall for the rest of the crawl
+            try:
+                self.flush(spider)
+            except Exception:
+                spider.logger.exception("[Pipeline] Periodic flush failed, rows stay buffered for the next one")
+
+    def flush(self, spider):
+        self.last_flush = time.monotonic()
+        spider.db.flush_detail_updates()
+        spider.db.flush_unrelated_urls()
+        if not self.pending_rows:
+            return
+
+        rows = list(self.pending_rows.values())
+        spider.logger.info(f"[Pipeline] Flushing {len(rows)} buffered items")
+        spider.db.upsert_detail_entries(rows)
+        # Only drop the buffer once the upsert has committed
+        self.pending_rows.clear()
+
     def close_spider(self, spider):
         spider.logger.info("Pipeline closing spider and updating availability")
 
-        # Run-scoped availability update
-        for isbn, expected_urls in spider.expected_urls.items():
+        if self.flush_loop and self.flush_loop.running:
+            self.flush_loop.stop()
+        self.flush(spider)
+        spider.db.flush_price_observations()
+
+        # Run-scoped availability update (incremental runs don't see every listing)
+        for isbn, expected_urls in ({} if spider.incremental else spider.expected_urls).items():
             found_urls = spider.found_urls.get(isbn, set())
             missing_urls = expected_urls - found_urls
 
@@ -33,8 +99,13 @@ class SQLitePipeline:
                 spider.logger.info(f"[Pipeline] ISBN {isbn} → {len(missing_urls)} products marked unavailable")
                 spider.db.mark_urls_unavailable(site_id=spider.site_id, isbn=isbn, urls=missing_urls)
 
-        # update history counts, delete old unavailable, close DB
+        # archive old sold listings, update history counts, refresh summaries
+        archived = spider.db.archive_sold_details(
+            site_id=spider.site_id, days=self.archive_after_days, batch_size=self.archive_batch_size
+        )
+        if archived:
+            spider.logger.info(f"[Pipeline] {archived} sold listings moved to the archive")
         spider.db.update_history_counts(site_id=spider.site_id)
-        spider.db.delete_old_unavailable_details(site_id=spider.site_id)
-        spider.db.close()
-
+        spider.db.refresh_summaries(site_id=spider.site_id)
+        spider.db.delete_expired_unrelated_urls(spider_domain=spider.spider_domain, days=self.unrelated_ttl_days)
+        spider.db.bump_cache_version()
@@ -36,6 +36,41 @@ ITEM_PIPELINES = {
     'books_scraper.pipelines.SQLitePipeline': 300,
 }
 
+# Search-list tiers used by main.py: how often each list is refreshed (seconds)
+# and the order due lists are crawled in (highest priority first). Unlisted files use "low".
+SEARCH_LIST_PRIORITIES = {
+    "high":   {"interval": 3600,      "priority": 20},
+    "medium": {"interval": 6 * 3600,  "priority": 10},
+    "low":    {"interval": 24 * 3600, "priority": 0},
+}
+SEARCH_LIST_STATE_FILE = "utils/search_list_schedule.json"
+# With `main.py --incremental`, every list still gets a full crawl this often (seconds)
+FULL_SWEEP_INTERVAL = 7 * 24 * 3600
+
+# SQLitePipeline write-behind buffer: flush every N items or every T seconds
+PIPELINE_BATCH_SIZE = 100
+PIPELINE_FLUSH_INTERVAL = 30
+
+# Unrelated (ISBN mismatch) listings are forgotten after this many days
+UNRELATED_URL_TTL_DAYS = 90
+
+# Sold listings move from details_table to archived_details_table after this many
+# days, ARCHIVE_BATCH_SIZE rows per transaction
+SOLD_ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 1000
+
+# Connection pool of the process-wide SQLAlchemy engine shared by all crawlers
+# (see spiders.database.get_engine); SQLite connections wait this long on a locked db
+DB_POOL_SIZE = 5
+DB_MAX_OVERFLOW = 5
+DB_POOL_RECYCLE = 1800
+SQLITE_BUSY_TIMEOUT_MS = 30000
+
+# Wallapop seller-name cache (userId -> name), persisted between runs
+SELLER_CACHE_PATH = "utils/wallapop_sellers.sqlite3"
+SELLER_CACHE_TTL = 7 * 24 * 3600
+SELLER_CACHE_SIZE = 10000
+
 
 # Obey robots.txt rules
 ROBOTSTXT_OBEY = False
@@ -1,4 +1,4 @@
-import os, csv
+import os
 from typing import Iterable, Any
 from urllib.parse import urlparse
 from collections import OrderedDict
@@ -6,7 +6,7 @@ from collections import OrderedDict
 from scrapy import Spider, Request
 from collections import defaultdict
 
-from .database import DatabaseManager
+from .database import DatabaseManager, configure_engine
 
 
 class BaseSpider(Spider):
@@ -30,26 +30,48 @@ class BaseSpider(Spider):
         'URLLENGTH_LIMIT': 10000
     }
 
-    def __init__(self, list_name: str=None, search_terms: str= None, **kwargs):
+    def __init__(self, list_name: str=None, search_terms: str= None, incremental=False,
+                 **kwargs):
         super().__init__(**kwargs)
         self.recent_scraped_urls = set()
+        self.list_name = list_name
         self.spider_name = f'{self.name}_{list_name}'
+        # Incremental crawl: newest-first results, stop paginating at the first page with nothing new.
+        # Listings are not marked unavailable in this mode, that is left to the periodic full sweep.
+        self.incremental = str(incremental).lower() in ('1', 'true', 'yes')
         self.spider_domain = urlparse(self.start_url).netloc
         self.search_keys = set(search_terms.split(',')) if search_terms else set()
 
         # Database manager
         self.db = DatabaseManager()
         self.site_id = self.db.save_spider_info(spider_name=self.spider_name, spider_domain=self.spider_domain)
+        self.db.load_url_index(site_id=self.site_id)
         os.makedirs(name='utils', exist_ok=True)
-        self.unrelated_file_name = f'utils/{self.name}_unrelated_urls.csv'
-        self.unrelated_data = self.read_csv(filename=self.unrelated_file_name)
+        self.unrelated_urls = {}  # search term -> set of urls, loaded lazily from unrelated_urls_table
         self.expected_urls = {}
         self.found_urls = defaultdict(set)
 
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        # Before __init__ creates the first DatabaseManager, which builds the shared engine
+        configure_engine(
+            pool_size=crawler.settings.getint('DB_POOL_SIZE', 5),
+            max_overflow=crawler.settings.getint('DB_MAX_OVERFLOW', 5),
+            pool_recycle=crawler.settings.getint('DB_POOL_RECYCLE', 1800),
+            busy_timeout_ms=crawler.settings.getint('SQLITE_BUSY_TIMEOUT_MS', 30000),
+        )
+        return super().from_crawler(crawler, *args, **kwargs)
+
     def start_requests(self) -> Iterable[Any]:
         yield Request(url=self.start_url, callback=self.parse, meta={'handle_httpstatus_all': True})
 
+    def follow_next_page(self, page_unchanged: bool) -> bool:
+        if self.incremental and page_unchanged:
+            self.crawler.stats.inc_value('incremental/pagination_stopped')
+            return False
+        return True
+
     def get_item(self, html_response=None, json_response=None):
         json_response = {} if not json_response else json_response
         item = OrderedDict()
@@ -92,33 +114,12 @@ class BaseSpider(Spider):
 
 
     # Using these functions as the vinted site show unrelated urls that didn't match the search term
-    def read_csv(self, filename: str) -> list:
-        data = []
-        try:
-            with open(filename, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    data.append(row)
-
-        except Exception as e:
-            self.logger.info(str(e))
-
-        return data
-
-    def get_all_urls_against_search_term(self, search_term: str) -> list[str]:
-        return [item.get('Url') for item in self.unrelated_data if item.get('Search Term') == search_term]
-
-    @staticmethod
-    def write_to_csv(data, mode: str = 'a', output_filename=None) -> None:
-        headers = data.keys() if isinstance(data, OrderedDict) else data[0].keys()
-        with open(output_filename, mode, newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=headers)
-
-            if csvfile.tell() == 0:
-                writer.writeheader()
-
-            if isinstance(data, OrderedDict):
-                writer.writerow(data)
-            else:
-                for row in data:
-                    writer.writerow(row)
\ No newline at end of file
+    def get_all_urls_against_search_term(self, search_term: str) -> set[str]:
+        if search_term not in self.unrelated_urls:
+            self.unrelated_urls[search_term] = self.db.fetch_unrelated_urls(spider_domain=self.spider_domain,
+                                                                            search_term=search_term)
+        return self.unrelated_urls[search_term]
+
+    def add_unrelated_url(self, search_term: str, url: str) -> None:
+        self.get_all_urls_against_search_term(search_term).add(url)
+        self.db.queue_unrelated_url(site_id=self.site_id, search_term=search_term, url=url)
\ No newline at end of file
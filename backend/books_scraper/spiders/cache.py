@@ -0,0 +1,73 @@
+import sqlite3
+import time
+from collections import OrderedDict
+
+
+class SellerCache:
+    """
+    userId -> seller name lookup. Kept in memory as an LRU bounded to `max_size`
+    entries, each valid for `ttl` seconds, and persisted to a local SQLite file
+    so the next run starts warm.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_size: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()  # user_id -> (name, fetched_at)
+        self.load()
+
+    # ── MEMORY ─────────────────────────────────────────────────────────────
+    def get(self, user_id: str) -> str | None:
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+
+        name, fetched_at = entry
+        if time.time() - fetched_at > self.ttl:
+            del self.entries[user_id]
+            return None
+
+        self.entries.move_to_end(user_id)
+        return name
+
+    def set(self, user_id: str, name: str, fetched_at: float = None) -> None:
+        self.entries[user_id] = (name, fetched_at or time.time())
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    # ── DISK ───────────────────────────────────────────────────────────────
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS sellers (user_id TEXT PRIMARY KEY, name TEXT, fetched_at REAL)"
+        )
+        return connection
+
+    def load(self) -> None:
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT user_id, name, fetched_at FROM sellers WHERE fetched_at >= ? "
+                "ORDER BY fetched_at DESC LIMIT ?",
+                (time.time() - self.ttl, self.max_size),
+            ).fetchall()
+        connection.close()
+
+        # Oldest first so the LRU order matches fetch order
+        for user_id, name, fetched_at in reversed(rows):
+            self.set(user_id, name, fetched_at)
+
+    def save(self) -> None:
+        with self.connect() as connection:
+            connection.execute("DELETE FROM sellers WHERE fetched_at < ?", (time.time() - self.ttl,))
+            connection.executemany(
+                "INSERT OR REPLACE INTO sellers (user_id, name, fetched_at) VALUES (?, ?, ?)",
+                [(user_id, name, fetched_at) for user_id, (name, fetched_at) in self.entries.items()],
+            )
+            connection.execute(
+                "DELETE FROM sellers WHERE user_id NOT IN "
+                "(SELECT user_id FROM sellers ORDER BY fetched_at DESC LIMIT ?)",
+                (self.max_size,),
+            )
+        connection.close()
@@ -1,106 +1,222 @@
 import os
 from datetime import date, timedelta
 from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, select, update, func, delete
+from sqlalchemy import create_engine, event, select, update, func, delete, case, literal, union_all, Boolean, Date
 from sqlalchemy.orm import sessionmaker
 
-from .models import Base, Source, History, Detail
+from .models import (
+    Base, Source, History, Detail, ArchivedDetail, UnrelatedUrl, Summary, CacheVersion, PriceObservation,
+)
 
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 load_dotenv(BASE_DIR / ".env")
 
+# One engine (and connection pool) per database url for the whole process, shared by
+# every crawler's DatabaseManager. Options apply to engines created after configure_engine().
+ENGINE_OPTIONS = {"pool_size": 5, "max_overflow": 5, "pool_recycle": 1800, "busy_timeout_ms": 30000}
+_engines = {}
+
+
+def configure_engine(**options) -> None:
+    ENGINE_OPTIONS.update(options)
+
+
+def get_engine(url: str = None):
+    url = url or os.environ.get("DATABASE_URL")
+    engine = _engines.get(url)
+    if engine is None:
+        options = dict(ENGINE_OPTIONS)
+        busy_timeout_ms = options.pop("busy_timeout_ms")
+        engine = create_engine(url, echo=False, future=True, pool_pre_ping=True, **options)
+        if engine.dialect.name == "sqlite":
+            @event.listens_for(engine, "connect")
+            def set_sqlite_pragmas(dbapi_connection, connection_record):
+                # WAL lets the dashboard read while a crawl writes; writers wait instead of failing
+                cursor = dbapi_connection.cursor()
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+                cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+                cursor.close()
+        _engines[url] = engine
+    return engine
+
 
 class DatabaseManager:
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        db_path = os.environ.get("DATABASE_URL")
-        self.engine = create_engine(db_path, echo=False, future=True)
-        Session = sessionmaker(bind=self.engine, autoflush=False, autocommit=False)
-        self.session = Session()
+        self.engine = get_engine()
+        self.Session = sessionmaker(bind=self.engine, autoflush=False, expire_on_commit=False)
+
+        # url -> (detail_id, price, availability), see load_url_index()
+        self.url_index = {}
+        self.pending_detail_updates = {}
+        self.touched_detail_ids = set()
+        self.pending_unrelated_urls = {}
+        # urls whose price is new or changed this run, see flush_price_observations()
+        self.price_changed_urls = set()
+
+    @contextmanager
+    def session_scope(self):
+        """
+        Unit of work: a short-lived session whose transaction commits when the
+        block exits and rolls back on error; its connection goes straight back
+        to the shared pool.
+        """
+        with self.Session() as session, session.begin():
+            yield session
 
     # ── SOURCE ─────────────────────────────────────────────────────────────
     def save_spider_info(self, spider_name: str, spider_domain: str) -> int:
-        row = (
-            self.session.query(Source)
-            .filter(Source.spider_name == spider_name, Source.spider_domain == spider_domain)
-            .first()
-        )
-        if not row:
-            row = Source(spider_name=spider_name, spider_domain=spider_domain)
-            self.session.add(row)
-            self.session.commit()
-        return row.spider_id
+        with self.session_scope() as session:
+            row = (
+                session.query(Source)
+                .filter(Source.spider_name == spider_name, Source.spider_domain == spider_domain)
+                .first()
+            )
+            if not row:
+                row = Source(spider_name=spider_name, spider_domain=spider_domain)
+                session.add(row)
+                session.flush()
+            return row.spider_id
 
     # ── FETCH HELPERS ──────────────────────────────────────────────────────
     def fetch_scraped_urls(self, site_id: int, availability: bool = True) -> list[str]:
-        return (
-            self.session.execute(
-                select(Detail.url).where(
-                    Detail.site_id == site_id,
-                    Detail.availability == availability,
+        with self.Session() as session:
+            return (
+                session.execute(
+                    select(Detail.url).where(
+                        Detail.site_id == site_id,
+                        Detail.availability == availability,
+                    )
                 )
+                .scalars()
+                .all()
             )
-            .scalars()
-            .all()
-        )
 
     def fetch_urls_by_site_and_isbn(self, site_id: int, isbn: str) -> set[str]:
-        rows = (
-            self.session.execute(
-                select(Detail.url).where(
-                    Detail.site_id == site_id,
-                    Detail.isbn == isbn,
-                    Detail.availability.is_(True),
+        with self.Session() as session:
+            rows = (
+                session.execute(
+                    select(Detail.url).where(
+                        Detail.site_id == site_id,
+                        Detail.isbn == isbn,
+                        Detail.availability.is_(True),
+                    )
                 )
+                .scalars()
+                .all()
             )
-            .scalars()
-            .all()
-        )
         return set(rows)
 
     # ── HISTORY ────────────────────────────────────────────────────────────
     def save_history_entry(self, site_id: int, isbn: str) -> int:
-        row = (
-            self.session.query(History)
-            .filter(History.site_id == site_id, History.isbn == isbn)
-            .first()
-        )
-        if row:
-            return row.history_id
+        with self.session_scope() as session:
+            row = (
+                session.query(History)
+                .filter(History.site_id == site_id, History.isbn == isbn)
+                .first()
+            )
+            if row:
+                return row.history_id
 
-        new_row = History(site_id=site_id, isbn=isbn)
-        self.session.add(new_row)
-        self.session.commit()
-        return new_row.history_id
+            new_row = History(site_id=site_id, isbn=isbn)
+            session.add(new_row)
+            session.flush()
+            return new_row.history_id
 
     # ── DETAIL UPDATE ──────────────────────────────────────────────────────
     def update_detail_keep_newest(self, url: str, updates: dict) -> int | None:
         if not url:
             return None
-        detail = (
-            self.session.query(Detail)
-            .filter(Detail.url == url)
-            .order_by(Detail.detail_id.desc())
-            .first()
-        )
-        if not detail:
-            return None
-        for key, value in updates.items():
-            setattr(detail, key, value)
-        self.session.commit()
-        return detail.detail_id
+        with self.session_scope() as session:
+            detail = (
+                session.query(Detail)
+                .filter(Detail.url == url)
+                .order_by(Detail.detail_id.desc())
+                .first()
+            )
+            if not detail:
+                return None
+            for key, value in updates.items():
+                setattr(detail, key, value)
+            return detail.detail_id
 
     def update_detail_entry(self, url: str, price: float, availability: bool):
         updates = {"price": price, "availability": availability, "date_scraped": date.today()}
         return self.update_detail_keep_newest(url, updates)
 
+    # ── URL INDEX ──────────────────────────────────────────────────────────
+    def load_url_index(self, site_id: int) -> None:
+        """Load every known url of the site once so listings can be matched without a query."""
+        with self.Session() as session:
+            rows = session.execute(
+                select(Detail.url, Detail.detail_id, Detail.price, Detail.availability).where(
+                    Detail.site_id == site_id
+                )
+            )
+            self.url_index = {url: (detail_id, price, availability) for url, detail_id, price, availability in rows}
+
+    def update_indexed_detail(self, url: str, price: float, availability: bool) -> int | None:
+        """
+        In-memory counterpart of update_detail_entry(): returns the detail_id when
+        the url is known and queues the change for flush_detail_updates().
+        """
+        entry = self.url_index.get(url) if url else None
+        if not entry:
+            return None
+
+        detail_id, old_price, old_availability = entry
+        price = old_price if price is None else float(price)
+        if price != old_price or availability != old_availability:
+            self.url_index[url] = (detail_id, price, availability)
+            self.pending_detail_updates[detail_id] = {"price": price, "availability": availability}
+            if price != old_price:
+                self.price_changed_urls.add(url)
+        else:
+            self.touched_detail_ids.add(detail_id)
+        return detail_id
+
+    def is_listing_unchanged(self, url: str, price: float) -> bool:
+        """True when the url is already stored as available at the same price."""
+        entry = self.url_index.get(url)
+        if not entry:
+            return False
+        _, old_price, old_availability = entry
+        return bool(old_availability) and (price is None or float(price) == old_price)
+
+    def flush_detail_updates(self, chunk_size: int = 500) -> None:
+        """Write queued listing updates: changed rows by primary key, the rest only get date_scraped."""
+        if not self.pending_detail_updates and not self.touched_detail_ids:
+            return
+
+        today = date.today()
+        changed = [
+            {"detail_id": detail_id, "date_scraped": today, **values}
+            for detail_id, values in self.pending_detail_updates.items()
+        ]
+        touched = list(self.touched_detail_ids - self.pending_detail_updates.keys())
+        with self.session_scope() as session:
+            if changed:
+                session.execute(update(Detail), changed)
+            for start in range(0, len(touched), chunk_size):
+                session.execute(
+                    update(Detail)
+                    .where(Detail.detail_id.in_(touched[start:start + chunk_size]))
+                    .values(date_scraped=today)
+                )
+
+        self.pending_detail_updates.clear()
+        self.touched_detail_ids.clear()
+
     # ── DETAIL INSERT ──────────────────────────────────────────────────────
-    def save_detail_entry(self, item: OrderedDict, history_id: int, site_id: int) -> int:
-        new_detail = Detail(
+    @staticmethod
+    def build_detail_row(item: OrderedDict, history_id: int, site_id: int) -> dict:
+        return dict(
             history_id   = history_id,
             isbn         = item.get("Search Term"),
             name         = item.get("Name"),
@@ -116,95 +232,333 @@ class DatabaseManager:
             first_seen   = date.today(),
             # interest defaults to "pending" via column default
         )
-        self.session.add(new_detail)
-        self.session.commit()
-        return new_detail.detail_id
+
+    def save_detail_entry(self, item: OrderedDict, history_id: int, site_id: int) -> int:
+        new_detail = Detail(**self.build_detail_row(item=item, history_id=history_id, site_id=site_id))
+        with self.session_scope() as session:
+            session.add(new_detail)
+            session.flush()
+            return new_detail.detail_id
+
+    # ── DETAIL BULK UPSERT ─────────────────────────────────────────────────
+    def insert(self, model):
+        """Dialect-specific INSERT, which supports ON CONFLICT clauses."""
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise NotImplementedError(f"ON CONFLICT inserts are not supported for {dialect}")
+        return insert(model)
+
+    def upsert_detail_entries(self, rows: list[dict]) -> None:
+        """
+        Insert new details and refresh price/availability of existing ones
+        (matched on the unique url) in a single statement and transaction.
+        Rows must not repeat a url — Postgres rejects touching a row twice.
+        """
+        if not rows:
+            return
+
+        for row in rows:
+            entry = self.url_index.get(row["url"])
+            if entry is None or entry[1] != row["price"]:
+                self.price_changed_urls.add(row["url"])
+
+        stmt = self.insert(Detail).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Detail.url],
+            set_={
+                "price":        stmt.excluded.price,
+                "availability": stmt.excluded.availability,
+                "date_scraped": stmt.excluded.date_scraped,
+            },
+        )
+        with self.session_scope() as session:
+            session.execute(stmt)
+
+    # ── PRICE HISTORY ──────────────────────────────────────────────────────
+    def flush_price_observations(self, chunk_size: int = 500) -> None:
+        """
+        Append today's price of every new or re-priced listing to
+        price_history_table, read back from details_table so it matches what
+        was stored. Run after the detail flushes; a second change on the same
+        day overwrites that day's row.
+        """
+        if not self.price_changed_urls:
+            return
+
+        urls = list(self.price_changed_urls)
+        columns = [PriceObservation.detail_id, PriceObservation.isbn, PriceObservation.observed_on, PriceObservation.price]
+        with self.session_scope() as session:
+            for start in range(0, len(urls), chunk_size):
+                rows = select(
+                    Detail.detail_id, Detail.isbn, literal(date.today(), Date), Detail.price
+                ).where(Detail.url.in_(urls[start:start + chunk_size]))
+                stmt = self.insert(PriceObservation).from_select(columns, rows)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[PriceObservation.detail_id, PriceObservation.observed_on],
+                    set_={"price": stmt.excluded.price},
+                )
+                session.execute(stmt)
+        self.price_changed_urls.clear()
+
+    # ── UNRELATED URLS ─────────────────────────────────────────────────────
+    def fetch_unrelated_urls(self, spider_domain: str, search_term: str) -> set[str]:
+        """Known mismatches of the search term on the domain, whichever list's crawl found them."""
+        with self.Session() as session:
+            rows = (
+                session.execute(
+                    select(UnrelatedUrl.url)
+                    .join(Source, Source.spider_id == UnrelatedUrl.site_id)
+                    .where(
+                        Source.spider_domain == spider_domain,
+                        UnrelatedUrl.search_term == search_term,
+                    )
+                )
+                .scalars()
+                .all()
+            )
+        return set(rows)
+
+    def queue_unrelated_url(self, site_id: int, search_term: str, url: str, batch_size: int = 100) -> None:
+        self.pending_unrelated_urls[(site_id, search_term, url)] = date.today()
+        if len(self.pending_unrelated_urls) >= batch_size:
+            self.flush_unrelated_urls()
+
+    def flush_unrelated_urls(self) -> None:
+        if not self.pending_unrelated_urls:
+            return
+
+        rows = [
+            {"site_id": site_id, "search_term": search_term, "url": url, "date_added": date_added}
+            for (site_id, search_term, url), date_added in self.pending_unrelated_urls.items()
+        ]
+        stmt = self.insert(UnrelatedUrl).values(rows).on_conflict_do_nothing(
+            index_elements=[UnrelatedUrl.site_id, UnrelatedUrl.search_term, UnrelatedUrl.url]
+        )
+        with self.session_scope() as session:
+            session.execute(stmt)
+        self.pending_unrelated_urls.clear()
+
+    def delete_expired_unrelated_urls(self, spider_domain: str, days: int) -> None:
+        """Expire the domain's mismatches under every list, as fetch_unrelated_urls() reads them."""
+        cutoff_date = date.today() - timedelta(days=days)
+        with self.session_scope() as session:
+            session.execute(
+                delete(UnrelatedUrl).where(
+                    UnrelatedUrl.site_id.in_(select(Source.spider_id).where(Source.spider_domain == spider_domain)),
+                    UnrelatedUrl.date_added < cutoff_date,
+                )
+            )
 
     # ── AVAILABILITY CONTROL ───────────────────────────────────────────────
     def mark_urls_unavailable(self, site_id: int, isbn: str, urls: set[str]) -> None:
         if not urls:
             return
-        self.session.execute(
-            update(Detail)
-            .where(Detail.site_id == site_id, Detail.isbn == isbn, Detail.url.in_(urls))
-            .values(availability=False, date_scraped=date.today())
-        )
-        self.session.commit()
+        with self.session_scope() as session:
+            session.execute(
+                update(Detail)
+                .where(Detail.site_id == site_id, Detail.isbn == isbn, Detail.url.in_(urls))
+                .values(availability=False, date_scraped=date.today())
+            )
 
     def mark_item_availability(self, site_id: int, url: str, availability: bool = False):
-        self.session.execute(
-            update(Detail)
-            .where(Detail.site_id == site_id, Detail.url == url)
-            .values(availability=availability)
-        )
-        self.session.commit()
+        with self.session_scope() as session:
+            session.execute(
+                update(Detail)
+                .where(Detail.site_id == site_id, Detail.url == url)
+                .values(availability=availability)
+            )
 
     # ── HISTORY COUNTS ─────────────────────────────────────────────────────
     def update_history_counts(self, site_id: int):
-        history_ids = (
-            self.session.execute(select(History.history_id).where(History.site_id == site_id))
-            .scalars()
-            .all()
-        )
-        for history_id in history_ids:
-            available_count = (
-                self.session.query(func.count(Detail.detail_id))
-                .filter(Detail.history_id == history_id, Detail.availability.is_(True))
-                .scalar()
-            )
-            sold_count = (
-                self.session.query(func.count(Detail.detail_id))
-                .filter(Detail.history_id == history_id, Detail.availability.is_(False))
-                .scalar()
-            )
-            self.session.execute(
+        """
+        Refresh available/sold counts of every history row of the site in one
+        statement. Sold counts include the listings in archived_details_table.
+        """
+        dialect = self.engine.dialect
+        if dialect.name == "postgresql" or (dialect.name == "sqlite" and dialect.dbapi.sqlite_version_info >= (3, 33)):
+            # UPDATE ... FROM and FILTER (WHERE ...) are available on Postgres and SQLite 3.33+
+            archived = (
+                select(ArchivedDetail.history_id.label("history_id"), func.count().label("archived"))
+                .where(ArchivedDetail.site_id == site_id)
+                .group_by(ArchivedDetail.history_id)
+                .subquery()
+            )
+            counts = (
+                select(
+                    History.history_id.label("history_id"),
+                    func.count(Detail.detail_id).filter(Detail.availability.is_(True)).label("available"),
+                    (
+                        func.count(Detail.detail_id).filter(Detail.availability.is_(False))
+                        + func.coalesce(func.max(archived.c.archived), 0)
+                    ).label("sold"),
+                )
+                .select_from(History)
+                .outerjoin(Detail, Detail.history_id == History.history_id)
+                .outerjoin(archived, archived.c.history_id == History.history_id)
+                .where(History.site_id == site_id)
+                .group_by(History.history_id)
+                .subquery()
+            )
+            stmt = (
                 update(History)
-                .where(History.history_id == history_id)
-                .values(available_books=available_count, sold_books=sold_count)
+                .where(History.history_id == counts.c.history_id)
+                .values(available_books=counts.c.available, sold_books=counts.c.sold)
             )
-        self.session.commit()
+        else:
+            # Older SQLite: correlated subqueries per history row
+            def count(availability: bool):
+                return (
+                    select(func.count(Detail.detail_id))
+                    .where(Detail.history_id == History.history_id, Detail.availability.is_(availability))
+                    .scalar_subquery()
+                )
 
-    # ── CLEANUP ────────────────────────────────────────────────────────────
-    def delete_old_unavailable_details(self, site_id: int):
-        cutoff_date = date.today() - timedelta(days=30)
-        history_ids = select(History.history_id).where(History.site_id == site_id)
-        self.session.execute(
-            delete(Detail).where(
-                Detail.availability.is_(False),
-                Detail.date_scraped < cutoff_date,
-                Detail.history_id.in_(history_ids),
+            archived = (
+                select(func.count(ArchivedDetail.detail_id))
+                .where(ArchivedDetail.history_id == History.history_id)
+                .scalar_subquery()
+            )
+            stmt = (
+                update(History)
+                .where(History.site_id == site_id)
+                .values(available_books=count(True), sold_books=count(False) + archived)
             )
+
+        with self.session_scope() as session:
+            session.execute(stmt)
+
+    # ── SUMMARIES ──────────────────────────────────────────────────────────
+    def refresh_summaries(self, site_id: int) -> None:
+        """
+        Rebuild the site's per-ISBN and per-seller rows of summary_table from
+        details_table and archived_details_table (all sold) in one transaction;
+        other sites' rows are left untouched.
+        """
+        listing_columns = ("site_id", "isbn", "seller", "price", "detail_id")
+        listings = union_all(
+            select(*(Detail.__table__.c[name] for name in listing_columns), Detail.availability)
+            .where(Detail.site_id == site_id),
+            select(*(ArchivedDetail.__table__.c[name] for name in listing_columns),
+                   literal(False, Boolean).label("availability"))
+            .where(ArchivedDetail.site_id == site_id),
+        ).subquery("listings")
+
+        available = listings.c.availability.is_(True)
+        available_price = case((available, listings.c.price))
+        available_count = func.count(case((available, listings.c.detail_id)))
+        sold_count = func.count(case((listings.c.availability.is_(False), listings.c.detail_id)))
+
+        columns = [
+            Summary.site_id, Summary.group_by, Summary.group_key, Summary.available_books, Summary.sold_books,
+            Summary.price_sum, Summary.avg_price, Summary.min_price, Summary.max_price, Summary.rotation_rate,
+            Summary.updated_on,
+        ]
+        with self.session_scope() as session:
+            session.execute(delete(Summary).where(Summary.site_id == site_id))
+            for group_by, column in (("isbn", listings.c.isbn), ("seller", listings.c.seller)):
+                group_key = func.coalesce(column, "")
+                rows = (
+                    select(
+                        listings.c.site_id,
+                        literal(group_by),
+                        group_key,
+                        available_count,
+                        sold_count,
+                        func.coalesce(func.sum(available_price), 0),
+                        func.avg(available_price),
+                        func.min(available_price),
+                        func.max(available_price),
+                        # Same rate as the API: sold / (available or 1) * 100
+                        sold_count * 100.0 / case((available_count > 0, available_count), else_=1),
+                        literal(date.today(), Date),
+                    )
+                    .group_by(listings.c.site_id, group_key)
+                )
+                session.execute(Summary.__table__.insert().from_select(columns, rows))
+
+    # ── API CACHE ──────────────────────────────────────────────────────────
+    def bump_cache_version(self, name: str = "responses") -> None:
+        """Invalidate the dashboard's cached API responses once this run's writes are committed."""
+        stmt = self.insert(CacheVersion).values(name=name, version=2)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheVersion.name], set_={"version": CacheVersion.version + 1}
         )
-        self.session.commit()
+        with self.session_scope() as session:
+            session.execute(stmt)
+
+    # ── ARCHIVE ────────────────────────────────────────────────────────────
+    def archive_sold_details(self, site_id: int, days: int = 30, batch_size: int = 1000) -> int:
+        """
+        Move the site's sold listings not seen for `days` days to
+        archived_details_table, `batch_size` rows at a time in detail_id order:
+        each batch is one INSERT ... SELECT and one DELETE by primary key in its
+        own transaction, so details_table is never locked for long.
+        Returns the number of rows moved.
+        """
+        cutoff_date = date.today() - timedelta(days=days)
+        columns = [column for column in Detail.__table__.columns if column.name != "availability"]
+        archive_columns = [ArchivedDetail.__table__.c[column.name] for column in columns]
+
+        moved, last_id = 0, 0
+        while True:
+            with self.Session() as session:
+                ids = (
+                    session.execute(
+                        select(Detail.detail_id)
+                        .where(
+                            Detail.site_id == site_id,
+                            Detail.availability.is_(False),
+                            Detail.date_scraped < cutoff_date,
+                            Detail.detail_id > last_id,
+                        )
+                        .order_by(Detail.detail_id)
+                        .limit(batch_size)
+                    )
+                    .scalars()
+                    .all()
+                )
+            if not ids:
+                return moved
+
+            rows = select(*columns, literal(date.today(), Date)).where(Detail.detail_id.in_(ids))
+            stmt = self.insert(ArchivedDetail).from_select([*archive_columns, ArchivedDetail.archived_on], rows)
+            with self.session_scope() as session:
+                session.execute(stmt.on_conflict_do_nothing(index_elements=[ArchivedDetail.detail_id]))
+                session.execute(delete(Detail).where(Detail.detail_id.in_(ids)))
+            moved += len(ids)
+            last_id = ids[-1]
 
     # ── DELETE SPIDER ──────────────────────────────────────────────────────
     def delete_spider_records(self, spider_name: str):
-        try:
-            spider = self.session.query(Source).filter(Source.spider_name == spider_name).first()
+        with self.session_scope() as session:
+            spider = session.query(Source).filter(Source.spider_name == spider_name).first()
             if not spider:
                 return
 
             spider_id   = spider.spider_id
             history_ids = [
                 h[0]
-                for h in self.session.query(History.history_id)
+                for h in session.query(History.history_id)
                 .filter(History.site_id == spider_id)
                 .all()
             ]
             if history_ids:
-                self.session.query(Detail).filter(Detail.history_id.in_(history_ids)).delete(
+                session.query(Detail).filter(Detail.history_id.in_(history_ids)).delete(
                     synchronize_session=False
                 )
-                self.session.query(History).filter(History.history_id.in_(history_ids)).delete(
+                session.query(ArchivedDetail).filter(ArchivedDetail.history_id.in_(history_ids)).delete(
                     synchronize_session=False
                 )
-            self.session.query(Source).filter(Source.spider_id == spider_id).delete(
+                session.query(History).filter(History.history_id.in_(history_ids)).delete(
+                    synchronize_session=False
+                )
+            session.query(Summary).filter(Summary.site_id == spider_id).delete(
+                synchronize_session=False
+            )
+            session.query(Source).filter(Source.spider_id == spider_id).delete(
                 synchronize_session=False
             )
-            self.session.commit()
-        except Exception:
-            self.session.rollback()
-            raise
-
-    def close(self):
-        self.session.close()
\ No newline at end of file
@@ -61,7 +61,114 @@ class Detail(Base):
 
     history = relationship("History", back_populates="details")
 
+    # Keep in sync with api.models.Detail.Meta.indexes (created by the Django migrations)
     __table_args__ = (
         UniqueConstraint("url", name="uq_detail_url"),
         Index("ix_details_interest", "interest"),
-    )
\ No newline at end of file
+        Index("ix_details_site_isbn_avail", "site_id", "isbn", "availability"),
+        Index("ix_details_hist_avail", "history_id", "availability"),
+        Index("ix_details_first_seen", "first_seen", "detail_id"),
+        Index("ix_details_price", "price", "detail_id"),
+        Index(
+            "ix_details_avail_isbn", "isbn", "detail_id",
+            postgresql_where=availability.is_(True), sqlite_where=availability.is_(True),
+        ),
+        Index(
+            "ix_details_sold_scraped", "date_scraped",
+            postgresql_where=availability.is_(False), sqlite_where=availability.is_(False),
+        ),
+    )
+
+
+class ArchivedDetail(Base):
+    """Sold listings moved out of details_table, see DatabaseManager.archive_sold_details()."""
+    __tablename__ = "archived_details_table"
+
+    detail_id    = Column(Integer, primary_key=True, autoincrement=False)
+    history_id   = Column(Integer, nullable=False)
+    isbn         = Column(String)
+    date_scraped = Column(Date)
+    first_seen   = Column(Date)
+    site_id      = Column(Integer)
+    name         = Column(Text)
+    price        = Column(Float)
+    seller       = Column(Text)
+    condition    = Column(Text)
+    editorial    = Column(Text)
+    images       = Column(JSON)
+    url          = Column(Text)
+    interest     = Column(String(20), nullable=False, default=INTEREST_PENDING)
+    contact      = Column(Boolean, default=False)
+    archived_on  = Column(Date, default=date.today)
+
+    # Keep in sync with api.models.ArchivedDetail (created by the Django migrations)
+    __table_args__ = (
+        Index("ix_archived_history", "history_id"),
+        Index("ix_archived_site_isbn", "site_id", "isbn"),
+        Index("ix_archived_date_scraped", "date_scraped"),
+    )
+
+
+class UnrelatedUrl(Base):
+    """Listings whose detail page didn't match the searched ISBN (Vinted search noise)."""
+    __tablename__ = "unrelated_urls_table"
+
+    unrelated_id = Column(Integer, primary_key=True, autoincrement=True)
+    site_id      = Column(Integer, nullable=False)
+    search_term  = Column(String, nullable=False)
+    url          = Column(Text, nullable=False)
+    date_added   = Column(Date, default=date.today)
+
+    __table_args__ = (
+        UniqueConstraint("site_id", "search_term", "url", name="uq_unrelated_site_term_url"),
+        Index("ix_unrelated_date_added", "date_added"),
+    )
+
+
+class Summary(Base):
+    """Per-site stats of every ISBN and seller, see DatabaseManager.refresh_summaries()."""
+    __tablename__ = "summary_table"
+
+    summary_id      = Column(Integer, primary_key=True, autoincrement=True)
+    site_id         = Column(Integer, nullable=False)
+    group_by        = Column(String(10), nullable=False)
+    group_key       = Column(Text, nullable=False)
+    available_books = Column(Integer, default=0)
+    sold_books      = Column(Integer, default=0)
+    price_sum       = Column(Float, default=0)
+    avg_price       = Column(Float)
+    min_price       = Column(Float)
+    max_price       = Column(Float)
+    rotation_rate   = Column(Float, default=0)
+    updated_on      = Column(Date, default=date.today)
+
+    # Keep in sync with api.models.Summary (created by the Django migrations)
+    __table_args__ = (
+        UniqueConstraint("site_id", "group_by", "group_key", name="uq_summary_site_group_key"),
+        Index("ix_summary_group_key", "group_by", "group_key"),
+    )
+
+
+class PriceObservation(Base):
+    """Append-only price history, see DatabaseManager.flush_price_observations()."""
+    __tablename__ = "price_history_table"
+
+    observation_id = Column(Integer, primary_key=True, autoincrement=True)
+    detail_id      = Column(Integer, nullable=False)
+    isbn           = Column(String, nullable=False)
+    observed_on    = Column(Date, nullable=False, default=date.today)
+    price          = Column(Float, nullable=False)
+
+    # Keep in sync with api.models.PriceObservation (created by the Django migrations)
+    __table_args__ = (
+        UniqueConstraint("detail_id", "observed_on", name="uq_price_detail_date"),
+        Index("ix_price_isbn_date", "isbn", "observed_on", "price"),
+    )
+
+
+class CacheVersion(Base):
+    """Generation counter of the API response cache, see DatabaseManager.bump_cache_version()."""
+    __tablename__ = "cache_version_table"
+
+    name    = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
@@ -1,6 +1,5 @@
 from typing import Any
 from urllib.parse import urlencode
-from collections import OrderedDict
 
 from scrapy import Request
 from scrapy.http import Response
@@ -38,7 +37,11 @@ class VintedSpider(BaseSpider):
     def parse(self, response: Response, **kwargs: Any) -> Any:
         for isbn in self.search_keys:
             isbn = str(isbn).strip()
-            url = f"https://www.vinted.es/catalog?{urlencode({'search_text': isbn})}"
+            params = {'search_text': isbn}
+            if self.incremental:
+                params['order'] = 'newest_first'
+
+            url = f"https://www.vinted.es/catalog?{urlencode(params)}"
             yield Request(url=url, callback=self.parse_listing, meta={'search_key': isbn}, dont_filter=True)
 
 
@@ -47,6 +50,7 @@ class VintedSpider(BaseSpider):
         unrelated_urls = self.get_all_urls_against_search_term(search_term=search_key)
 
         products_list = response.css('.feed-grid__item-content')
+        page_unchanged = bool(products_list)
 
         for product in products_list:
             product_url = product.css('a::attr(href)').get()
@@ -61,7 +65,9 @@ class VintedSpider(BaseSpider):
                 print(f'Skipping unrelated item: {url}')
                 continue
 
-            if self.db.update_detail_entry(url=url, price=price, availability=True):
+            page_unchanged = page_unchanged and self.db.is_listing_unchanged(url=url, price=price)
+
+            if self.db.update_indexed_detail(url=url, price=price, availability=True):
                 # Product exists: update price & availability, skip detail page
                 self.recent_scraped_urls.add(url)
                 print(f"Updated existing product: {url}, skipped detail page.\n")
@@ -70,8 +76,8 @@ class VintedSpider(BaseSpider):
                               dont_filter=True)
                 print(f'Insert New Record: {url}\n')
 
-        if next_url:=(response.css('[data-testid="catalog-pagination--next-page"][aria-disabled="false"]::attr(href)').
-                extract_first('').strip()):
+        if (next_url:=(response.css('[data-testid="catalog-pagination--next-page"][aria-disabled="false"]::attr(href)').
+                extract_first('').strip())) and self.follow_next_page(page_unchanged):
             yield Request(url=self.start_url+next_url, callback=self.parse_listing, meta={'search_key': search_key},
                           dont_filter=True)
 
@@ -83,13 +89,8 @@ class VintedSpider(BaseSpider):
 
         else:
             self.logger.debug(f"ISBN didn\'t match with {search_key}")
-            new_item = OrderedDict()
-
-            new_item['Search Term'] = search_key
-            new_item['Url'] = response.meta.get('url')
-
-            self.write_to_csv(data=new_item, output_filename=self.unrelated_file_name)
-            print(new_item)
+            self.add_unrelated_url(search_term=search_key, url=response.meta.get('url'))
+            print(f'Unrelated item: {response.meta.get("url")}')
 
     def get_search_term(self, html_response, json_response):
         return html_response.meta.get('search_key')
@@ -2,11 +2,11 @@ from json import loads
 from typing import Any
 from urllib.parse import urlencode
 
-import requests
 from scrapy import Request
 from scrapy.http import Response
 
 from .base import BaseSpider
+from .cache import SellerCache
 
 
 class WallapopSpider(BaseSpider):
@@ -27,6 +27,19 @@ class WallapopSpider(BaseSpider):
     def __init__(self, list_name: str=None, search_terms: str= None, **kwargs):
         super().__init__(list_name, search_terms, **kwargs)
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.seller_cache = SellerCache(
+            path=settings.get('SELLER_CACHE_PATH') or f'utils/{cls.name}_sellers.sqlite3',
+            ttl=settings.getfloat('SELLER_CACHE_TTL', 7 * 24 * 3600),
+            max_size=settings.getint('SELLER_CACHE_SIZE', 10000),
+        )
+        return spider
+
+    def closed(self, reason):
+        self.seller_cache.save()
 
     def parse(self, response, **kwargs):
         for isbn in self.search_keys:
@@ -36,10 +49,13 @@ class WallapopSpider(BaseSpider):
 
     def parse_listing(self, response):
         try:
-            products = loads(response.text).get('data', {}).get('section', {}).get('payload', {}).get('items', [])
+            json_data = loads(response.text)
         except Exception as e:
             self.logger.error(f"Error parsing response: {e}")
-            products = []
+            json_data = {}
+
+        products = json_data.get('data', {}).get('section', {}).get('payload', {}).get('items', [])
+        page_unchanged = bool(products)
 
         isbn = response.meta.get('isbn')
 
@@ -53,9 +69,10 @@ class WallapopSpider(BaseSpider):
 
             # Track this URL as found in this run
             self.found_urls[isbn].add(url)
+            page_unchanged = page_unchanged and self.db.is_listing_unchanged(url=url, price=price)
 
             # Check if product exists in DB
-            if self.db.update_detail_entry(url=url, price=price, availability=True):
+            if self.db.update_indexed_detail(url=url, price=price, availability=True):
                 # Already exists: skip detail page
                 print(f"Updated existing product: {url}, skipped detail page.\n")
 
@@ -64,14 +81,44 @@ class WallapopSpider(BaseSpider):
                 yield Request(url=url, headers=self.headers, callback=self.parse_details, meta={'isbn': isbn})
                 print(f'Insert New Record: {url}\n')
 
+        if (next_page := json_data.get('meta', {}).get('next_page')) and self.follow_next_page(page_unchanged):
+            yield self.build_request(isbn=isbn, next_page_token=next_page)
+
 
     def parse_details(self, response: Response) -> Any:
         json_data = loads(response.css('script[id="__NEXT_DATA__"]::text').extract_first('{}')) or {}
         json_item = json_data.get('props', {}).get('pageProps', {}).get('item', {})
         json_item['isbn'] = response.meta.get('isbn', '')
         json_item['Url'] = response.url
+        item = self.get_item(json_response=json_item)
+
+        # Seller name comes from the users API: chain it through the downloader instead of blocking the reactor
+        if not (user_id := json_item.get('userId')):
+            yield item
+            return
 
-        yield self.get_item(json_response=json_item)
+        if (seller := self.seller_cache.get(user_id)) is not None:
+            self.crawler.stats.inc_value('seller_cache/hit')
+            item['Seller'] = seller
+            yield item
+            return
+
+        self.crawler.stats.inc_value('seller_cache/miss')
+        yield Request(url=f"https://api.wallapop.com/api/v3/users/{user_id}", headers=self.headers,
+                      callback=self.parse_seller, errback=self.seller_failed,
+                      cb_kwargs={'item': item, 'user_id': user_id}, dont_filter=True)
+
+    def parse_seller(self, response: Response, item, user_id: str) -> Any:
+        seller_data = self.load_json_data(response=response)
+        item['Seller'] = seller_data.get('micro_name', '')
+        if 'micro_name' in seller_data:
+            self.seller_cache.set(user_id, item['Seller'])
+        yield item
+
+    def seller_failed(self, failure):
+        item = failure.request.cb_kwargs['item']
+        self.logger.warning(f"Seller lookup failed for {item.get('Url')}: {failure.value!r}")
+        yield item
 
 
     # ---------------- Getter methods (stubs to override) ----------------
@@ -88,10 +135,8 @@ class WallapopSpider(BaseSpider):
         return json_response.get('condition', {}).get('text', 'Unknown') or 'Unknown'
 
     def get_seller(self, html_response, json_response):
-        seller_url = f"https://api.wallapop.com/api/v3/users/{json_response.get('userId', '')}"
-        seller_response = requests.get(url=seller_url, headers=self.headers)
-
-        return self.load_json_data(response=seller_response).get('micro_name', '')
+        # Filled in by parse_seller once the users API responds
+        return ''
 
     def get_images(self, html_response, json_response):
         return [row.get('urls', {}).get('big', '') for row in json_response.get('images', [])]
@@ -107,6 +152,9 @@ class WallapopSpider(BaseSpider):
             'longitude': '-3.69196',
         }
 
+        if self.incremental:
+            params['order_by'] = 'newest'
+
         if next_page_token:
             params['next_page'] = next_page_token
 
@@ -0,0 +1,196 @@
+"""
+Scraper-side tests. Run from backend/books_scraper:
+    python -m unittest tests
+"""
+import logging
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from scrapy.utils.test import get_crawler
+from sqlalchemy import update
+
+import main
+from pipelines import SQLitePipeline
+from spiders import database
+from spiders.database import DatabaseManager, get_engine
+from spiders.models import ArchivedDetail, Base, Detail, History, Source, Summary, UnrelatedUrl
+from spiders.vinted import VintedSpider
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Fresh SQLite file per test, picked up by DatabaseManager through DATABASE_URL; cwd is a temp dir."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        env = mock.patch.dict(os.environ, {"DATABASE_URL": f"sqlite:///{self.tmp_dir}/test.sqlite3"})
+        env.start()
+        self.addCleanup(env.stop)
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        self.addCleanup(os.chdir, cwd)
+
+        self.engine = get_engine()
+        self.addCleanup(self.engine.dispose)
+        Base.metadata.create_all(self.engine)
+        self.db = DatabaseManager()
+
+
+class EngineTests(DatabaseTestCase):
+    def test_crawlers_share_the_pooled_engine(self):
+        high, medium = VintedSpider(list_name="high"), VintedSpider(list_name="medium")
+        self.assertIs(high.db.engine, self.engine)
+        self.assertIs(medium.db.engine, self.engine)
+        self.assertEqual(self.engine.pool.size(), database.ENGINE_OPTIONS["pool_size"])
+
+    @mock.patch.dict(database.ENGINE_OPTIONS)
+    @mock.patch.dict(database._engines)
+    def test_crawler_settings_size_engines_created_afterwards(self):
+        get_crawler(VintedSpider, {"DB_POOL_SIZE": 3, "DB_MAX_OVERFLOW": 1})._create_spider(list_name="high")
+        engine = get_engine(f"sqlite:///{self.tmp_dir}/other.sqlite3")
+        self.addCleanup(engine.dispose)
+        self.assertEqual((engine.pool.size(), engine.pool._max_overflow), (3, 1))
+
+    def test_session_scope_commits_on_success(self):
+        with self.db.session_scope() as session:
+            session.add(Source(spider_name="vinted_high", spider_domain="www.vinted.es"))
+        with self.db.Session() as session:
+            self.assertEqual(session.query(Source).count(), 1)
+
+    def test_session_scope_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.session_scope() as session:
+                session.add(Source(spider_name="vinted_high", spider_domain="www.vinted.es"))
+                session.flush()
+                raise RuntimeError("crawl aborted")
+        with self.db.Session() as session:
+            self.assertEqual(session.query(Source).count(), 0)
+
+
+class PipelineFlushTests(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = SQLitePipeline(batch_size=100, flush_interval=0)
+        self.spider = mock.Mock(site_id=1, logger=logging.getLogger("test"))
+        self.spider.db.save_history_entry.return_value = 10
+        self.spider.db.build_detail_row.side_effect = lambda item, history_id, site_id: {"url": item["Url"]}
+        for url in ("u1", "u2"):
+            self.pipeline.process_item({"Search Term": "isbn", "Url": url}, self.spider)
+
+    def test_failed_flush_keeps_rows_buffered(self):
+        self.spider.db.upsert_detail_entries.side_effect = RuntimeError("database is locked")
+        with self.assertRaises(RuntimeError):
+            self.pipeline.flush(self.spider)
+        self.assertEqual(list(self.pipeline.pending_rows), ["u1", "u2"])
+
+        self.spider.db.upsert_detail_entries.side_effect = None
+        self.pipeline.flush(self.spider)
+        self.spider.db.upsert_detail_entries.assert_called_with([{"url": "u1"}, {"url": "u2"}])
+        self.assertFalse(self.pipeline.pending_rows)
+
+    def test_periodic_flush_logs_errors_instead_of_raising(self):
+        self.spider.db.upsert_detail_entries.side_effect = RuntimeError("database is locked")
+        with self.assertLogs("test", level="ERROR"):
+            self.pipeline.flush_if_due(self.spider)
+        self.assertEqual(len(self.pipeline.pending_rows), 2)
+
+
+class ConcurrentRunnerTests(unittest.TestCase):
+    def started(self, runner):
+        return [call.kwargs["list_name"] for call in runner.process.crawl.call_args_list]
+
+    @mock.patch.object(main, "CrawlerProcess")
+    def test_per_domain_slots_limit_crawlers_of_one_site(self, _):
+        runner = main.ConcurrentRunner(concurrency=3, per_domain=2)
+        for list_name in ("high", "medium", "low"):
+            runner.add_job(main.WallapopSpider, list_name=list_name)
+
+        runner._crawl_next()
+        self.assertEqual(self.started(runner), ["high", "medium"])
+
+        runner.spider_closed(mock.Mock(spider_domain=main.spider_domain(main.WallapopSpider)), "finished")
+        self.assertEqual(self.started(runner), ["high", "medium", "low"])
+
+    @mock.patch.object(main, "CrawlerProcess")
+    def test_only_finished_crawls_count_as_done(self, _):
+        runner = main.SequentialRunner()
+        runner.spider_closed(mock.Mock(list_name="high"), "finished")
+        runner.spider_closed(mock.Mock(list_name="low"), "shutdown")
+        self.assertEqual(runner.finished, {"high": 1})
+
+
+class UnrelatedUrlTests(DatabaseTestCase):
+    SEARCH_TERM = "9788468358604"
+
+    def test_blocklist_is_shared_by_every_list_of_the_spider(self):
+        high, medium = VintedSpider(list_name="high"), VintedSpider(list_name="medium")
+        self.assertNotEqual(high.site_id, medium.site_id)
+
+        high.add_unrelated_url(search_term=self.SEARCH_TERM, url="https://www.vinted.es/items/1")
+        medium.add_unrelated_url(search_term=self.SEARCH_TERM, url="https://www.vinted.es/items/2")
+        high.db.flush_unrelated_urls()
+        medium.db.flush_unrelated_urls()
+        self.assertEqual(
+            VintedSpider(list_name="low").get_all_urls_against_search_term(self.SEARCH_TERM),
+            {"https://www.vinted.es/items/1", "https://www.vinted.es/items/2"},
+        )
+
+    def test_expiry_covers_every_list_of_the_domain(self):
+        high = VintedSpider(list_name="high")
+        high.add_unrelated_url(search_term=self.SEARCH_TERM, url="https://www.vinted.es/items/1")
+        high.db.flush_unrelated_urls()
+        with self.db.session_scope() as session:
+            session.execute(update(UnrelatedUrl).values(date_added=date.today() - timedelta(days=200)))
+
+        low = VintedSpider(list_name="low")
+        low.db.delete_expired_unrelated_urls(spider_domain=low.spider_domain, days=90)
+        self.assertEqual(VintedSpider(list_name="medium").get_all_urls_against_search_term(self.SEARCH_TERM), set())
+
+
+class ArchiveSoldDetailsTests(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.site_id = self.db.save_spider_info("vinted_high", "www.vinted.es")
+        self.history_id = self.db.save_history_entry(self.site_id, "9788468358604")
+        old, recent = date.today() - timedelta(days=40), date.today() - timedelta(days=5)
+        listings = [(old, False)] * 5 + [(recent, False), (old, True)]
+        with self.db.session_scope() as session:
+            session.add_all(
+                Detail(
+                    history_id=self.history_id, isbn="9788468358604", name="Book", price=10, seller="seller",
+                    condition="Nuevo", editorial="", images=[], url=f"https://www.vinted.es/items/{n}",
+                    site_id=self.site_id, availability=availability, date_scraped=scraped, first_seen=scraped,
+                )
+                for n, (scraped, availability) in enumerate(listings)
+            )
+
+    def counts(self):
+        self.db.update_history_counts(self.site_id)
+        self.db.refresh_summaries(self.site_id)
+        with self.db.Session() as session:
+            history = session.get(History, self.history_id)
+            summary = session.query(Summary).filter_by(group_by="isbn").one()
+            return (
+                session.query(Detail).count(),
+                session.query(ArchivedDetail).count(),
+                (history.available_books, history.sold_books),
+                (summary.available_books, summary.sold_books),
+            )
+
+    def test_old_sold_rows_move_in_batches_and_stay_counted(self):
+        with mock.patch.object(self.db, "session_scope", wraps=self.db.session_scope) as scope:
+            self.assertEqual(self.db.archive_sold_details(self.site_id, days=30, batch_size=2), 5)
+        self.assertEqual(scope.call_count, 3)  # one transaction per batch of 2
+        self.assertEqual(self.counts(), (2, 5, (1, 6), (1, 6)))
+
+    def test_rerun_is_idempotent(self):
+        self.db.archive_sold_details(self.site_id, days=30, batch_size=2)
+        self.assertEqual(self.db.archive_sold_details(self.site_id, days=30, batch_size=2), 0)
+        self.assertEqual(self.counts(), (2, 5, (1, 6), (1, 6)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,11 +18,10 @@ document.addEventListener('DOMContentLoaded', () => {
     setupPanelSwitching();
 
     loadStatistics();
-    loadMarketplaces();
-    loadPriceRange();
-    loadConditions();
+    // One facets request fills the marketplaces, price inputs and conditions
+    loadFacets({ fillPrices: true }).then(data => renderMarketplaces(data?.marketplaces || {}));
 
-    setupPriceValidation(loadConditions, debounce);
+    setupPriceValidation(loadFacets, debounce);
     setupDaysFilter();
 
     // Ensure mutual exclusivity of interest filters
@@ -162,10 +161,8 @@ function invokeApplyFiltersWhenReady() {
     }, 100);
 }
 
-async function loadMarketplaces() {
+function renderMarketplaces(data) {
     try {
-        const res  = await fetch('/api/market_place_names/');
-        const data = await res.json();
         const container = document.getElementById('marketplaceContainer');
         container.innerHTML = '';
 
@@ -181,7 +178,7 @@ async function loadMarketplaces() {
             const items = [];
             state.forEach((arr, key) => arr.forEach(v => items.push(`${key}_${v}`)));
             hidden.value = items.join(',');
-            loadConditions();
+            loadFacets();
         };
 
         Object.entries(data).forEach(([marketplace, variants]) => {
@@ -220,26 +217,15 @@ async function loadMarketplaces() {
             container.appendChild(card);
         });
 
-        updateHidden();
-    } catch(e) {
-        console.error('loadMarketplaces error:', e);
-    }
-}
-
-async function loadPriceRange() {
-    try {
-        const res  = await fetch('/api/price_range_of_books/');
-        const data = await res.json();
-        const minEl = document.getElementById('minPrice');
-        const maxEl = document.getElementById('maxPrice');
-        if (minEl && !minEl.value) minEl.value = data.min_price ?? '';
-        if (maxEl && !maxEl.value) maxEl.value = data.max_price ?? '';
+        hidden.value = '';  // nothing selected yet; facets for no domains are already loaded
     } catch(e) {
-        console.error('loadPriceRange error:', e);
+        console.error('renderMarketplaces error:', e);
     }
 }
 
-async function loadConditions() {
+// Condition options (with counts) for the current filters, one request. The price
+// inputs are only prefilled with the bounds on first load, so users can clear them.
+async function loadFacets({ fillPrices = false } = {}) {
     const minEl = document.getElementById('minPrice');
     const maxEl = document.getElementById('maxPrice');
     const marketHidden = document.getElementById('marketplace');
@@ -251,22 +237,30 @@ async function loadConditions() {
     if (prices?.max !== undefined) params.set('max_price', prices.max);
 
     try {
-        const url = `/api/conditions_of_books/${params.toString() ? '?' + params : ''}`;
-        const res = await fetch(url);
-        populateConditions(await res.json());
-    } catch {
+        const url = `/api/filter_facets/${params.toString() ? '?' + params : ''}`;
+        const res  = await fetch(url);
+        const data = await res.json();
+        if (fillPrices) {
+            if (minEl && !minEl.value) minEl.value = data.min_price ?? '';
+            if (maxEl && !maxEl.value) maxEl.value = data.max_price ?? '';
+        }
+        populateConditions(data.conditions || [], data.condition_counts || {});
+        return data;
+    } catch(e) {
+        console.error('loadFacets error:', e);
         populateConditions([]);
+        return null;
     }
 }
 
-function populateConditions(list) {
+function populateConditions(list, counts = {}) {
     const select = document.getElementById('condition');
     if (!select) return;
     const current = select.value;
     select.innerHTML = '<option value="">All Conditions</option>';
     list.filter(c => c !== 'All').forEach(c => {
         const opt = document.createElement('option');
-        opt.value = c; opt.textContent = c;
+        opt.value = c; opt.textContent = counts[c] !== undefined ? `${c} (${counts[c]})` : c;
         if (c === current) opt.selected = true;
         select.appendChild(opt);
     });
@@ -493,6 +487,35 @@ function renderFilteredResults() {
     updateInterestedBadge();
 
     renderResults(dataToRender);
+
+    // Groups come a page at a time (keyset cursor from all_filtered_results)
+    const container = document.getElementById('resultsContainer');
+    if (container && window.nextResultsCursor) {
+        const more = document.createElement('button');
+        more.className = 'btn btn-outline-secondary w-100 mb-3';
+        more.textContent = 'Load more';
+        more.addEventListener('click', () => {
+            more.disabled = true;
+            loadResultsPage(window.nextResultsCursor).catch(err => {
+                console.error('Error fetching more results:', err);
+                more.disabled = false;
+            });
+        });
+        container.appendChild(more);
+    }
+}
+
+function loadResultsPage(cursor = null) {
+    const params = new URLSearchParams(window.lastResultsParams);
+    if (cursor) params.set('cursor', cursor);
+
+    return fetch(`/api/all_filtered_results/?${params.toString()}`)
+        .then(res => { if (!res.ok) throw new Error(res.status); return res.json(); })
+        .then(data => {
+            window.lastResultsData = cursor ? [...window.lastResultsData, ...data.results] : data.results;
+            window.nextResultsCursor = data.next_cursor;
+            renderFilteredResults();
+        });
 }
 
 export function applyFilters() {
@@ -531,12 +554,8 @@ export function applyFilters() {
             </div>`;
     }
 
-    fetch(`/api/all_filtered_results/?${params.toString()}`)
-        .then(res => { if (!res.ok) throw new Error(res.status); return res.json(); })
-        .then(data => {
-            window.lastResultsData = data;
-            renderFilteredResults();
-        })
+    window.lastResultsParams = params.toString();
+    loadResultsPage()
         .catch(err => {
             console.error('Error fetching filtered results:', err);
             if (container) {